@@ -4,11 +4,15 @@ Responsible for internet research, keyword extraction, and fact-finding
 Uses: Groq API (free) + DuckDuckGo Search (free, no key needed)
 """
 
-from groq import Groq
-from typing import Dict
+from typing import Callable, List, Tuple
 import os
+from tools.query_planner import QueryPlanner
 from tools.search_tool import SearchTool
+from utils.deadline import Deadline, cancellation_status, current_deadline, deadline_scope
+from utils.keywords import keyword_extractor, format_keywords
+from utils.llm import chat_completion, create_client
 from utils.logger import agent_logger
+from utils.records import ResearchResult
 
 
 class ResearcherAgent:
@@ -20,7 +24,7 @@ class ResearcherAgent:
     def __init__(self, model: str = None):
         self.name = "SEO Researcher"
         self.model = model or os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile")
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = create_client()
         self.search_tool = SearchTool()
 
         self.system_prompt = """You are an expert SEO Researcher and Content Strategist.
@@ -41,30 +45,50 @@ Always provide your findings in a structured format with:
 
 Be thorough, accurate, and data-driven in your research."""
 
-    def _search_and_compile(self, topic: str) -> str:
-        """Search multiple angles and compile results"""
-        queries = [
+    def _search_and_compile(self, topic: str) -> Tuple[str, List[str]]:
+        """Search multiple angles and compile results
+
+        Returns:
+            The compiled search text for the prompt and the raw title/snippet
+            strings used for local keyword extraction
+        """
+        planner = QueryPlanner(
             topic,
-            f"{topic} latest trends 2024 2025",
-            f"{topic} statistics facts benefits",
-        ]
+            min_novelty=float(os.getenv("RESEARCH_MIN_NOVELTY", 0.3)),
+            max_queries=int(os.getenv("RESEARCH_MAX_QUERIES", 4)),
+        )
 
         all_results = []
-        for query in queries:
+        snippets = []
+        query = planner.next_query()
+        while query:
+            current_deadline().check()
             agent_logger.log_tool_use("DuckDuckGo Search (Free)", query)
             results = self.search_tool.search(query)
-            if results and "error" not in results[0]:
-                all_results.append(f"\n=== Search: '{query}' ===")
-                for i, r in enumerate(results[:3], 1):
-                    all_results.append(
-                        f"{i}. {r.get('title', '')}\n"
-                        f"   {r.get('snippet', '')}\n"
-                        f"   Source: {r.get('link', '')}"
-                    )
-
-        return "\n".join(all_results) if all_results else "No search results found."
-
-    def research(self, topic: str) -> Dict[str, any]:
+            if results and results[0].error is None:
+                new_results = planner.observe(results)
+                if new_results:
+                    all_results.append(f"\n=== Search: '{query}' ===")
+                    for i, r in enumerate(new_results[:3], 1):
+                        all_results.append(
+                            f"{i}. {r.title}\n"
+                            f"   {r.snippet}\n"
+                            f"   Source: {r.link}"
+                        )
+                    # Keyword extraction sees every new result, not just the top 3 shown to the LLM
+                    snippets.extend(f"{r.title}. {r.snippet}" for r in new_results)
+            query = planner.next_query()
+
+        agent_logger.log_tool_use(
+            "Query Planner",
+            f"{len(planner.issued)} queries, {len(planner.seen_urls)} unique sources, "
+            f"novelty {[round(n, 2) for n in planner.novelty]}"
+        )
+
+        search_data = "\n".join(all_results) if all_results else "No search results found."
+        return search_data, snippets
+
+    def research(self, topic: str) -> ResearchResult:
         """
         Conduct comprehensive research on the given topic
 
@@ -72,25 +96,95 @@ Be thorough, accurate, and data-driven in your research."""
             topic: The topic to research
 
         Returns:
-            Dictionary containing research findings
+            ResearchResult with the findings and keywords
         """
         agent_logger.log_agent_start(self.name, f"Researching: {topic}")
 
         try:
             # Step 1: Gather free search results via DuckDuckGo
-            search_data = self._search_and_compile(topic)
+            search_data, snippets = self._search_and_compile(topic)
+
+            # Step 2: Rank keywords locally instead of spending LLM tokens on them
+            keywords = keyword_extractor.extract(snippets)
+
+            # Step 3: Ask Groq (free) to analyze and structure findings
+            return self._analyze(topic, search_data, keywords)
+
+        except Exception as e:
+            agent_logger.log_agent_error(self.name, str(e))
+            return ResearchResult(
+                agent=self.name,
+                findings=f"Research error: {str(e)}",
+                status=cancellation_status(e)
+            )
 
-            # Step 2: Ask Groq (free) to analyze and structure findings
-            prompt = f"""Based on the following internet search results about "{topic}", provide comprehensive research findings.
+    def research_batch(self, topics: List[str],
+                       stage_deadline: Callable[[], Deadline] = None) -> List[ResearchResult]:
+        """
+        Research many topics, extracting all keywords in one vectorized pass
+
+        Args:
+            topics: The topics to research
+            stage_deadline: Returns a fresh deadline for each topic's search and,
+                separately, its analysis; defaults to the current deadline
+
+        Returns:
+            One ResearchResult per topic, in input order
+        """
+        stage_deadline = stage_deadline or current_deadline
+        gathered = []
+        for topic in topics:
+            agent_logger.log_agent_start(self.name, f"Researching: {topic}")
+            try:
+                with deadline_scope(stage_deadline()):
+                    gathered.append(self._search_and_compile(topic))
+            except Exception as e:
+                agent_logger.log_agent_error(self.name, str(e))
+                gathered.append(e)
+
+        all_keywords = keyword_extractor.extract_batch(
+            [[] if isinstance(g, Exception) else g[1] for g in gathered]
+        )
+
+        results = []
+        for topic, searched, keywords in zip(topics, gathered, all_keywords):
+            try:
+                if isinstance(searched, Exception):
+                    raise searched
+                with deadline_scope(stage_deadline()):
+                    results.append(self._analyze(topic, searched[0], keywords))
+            except Exception as e:
+                agent_logger.log_agent_error(self.name, str(e))
+                results.append(ResearchResult(
+                    agent=self.name,
+                    findings=f"Research error: {str(e)}",
+                    status=cancellation_status(e)
+                ))
+        return results
+
+    def _analyze(self, topic: str, search_data: str, keywords: List[str]) -> ResearchResult:
+        """Have the LLM structure the findings around the locally ranked keywords"""
+        if keywords:
+            keyword_brief = ", ".join(keywords)
+            keyword_instructions = f"""PRE-EXTRACTED KEYWORDS (ranked, already shown to the user):
+{keyword_brief}
+
+Do NOT write a keywords section; build on the keywords above instead.
+Keep every section to short, specific bullet points.
+"""
+        else:
+            keyword_instructions = """## 🔑 Top Keywords (10-15)
+List the most relevant SEO keywords
+"""
+
+        prompt = f"""Based on the following internet search results about "{topic}", provide comprehensive research findings.
 
 SEARCH RESULTS:
 {search_data}
 
 Please analyze and provide:
 
-## 🔑 Top Keywords (10-15)
-List the most relevant SEO keywords
-
+{keyword_instructions}
 ## 📊 Key Facts & Statistics
 List important facts and numbers found
 
@@ -105,30 +199,25 @@ What are the most important points to address?
 
 Be specific and use the actual search data provided."""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
-
-            findings = response.choices[0].message.content
-            agent_logger.log_agent_complete(self.name, findings[:100])
-
-            return {
-                "agent": self.name,
-                "findings": findings,
-                "raw_search_data": search_data,
-                "status": "success"
-            }
-
-        except Exception as e:
-            agent_logger.log_agent_error(self.name, str(e))
-            return {
-                "agent": self.name,
-                "findings": f"Research error: {str(e)}",
-                "status": "error"
-            }
+        findings = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1200 if keywords else 2000,
+            temperature=0.3,
+            stage="research"
+        )
+        if keywords:
+            findings = f"{format_keywords(keywords)}\n\n{findings}"
+        agent_logger.log_agent_complete(self.name, findings[:100])
+
+        return ResearchResult(
+            agent=self.name,
+            findings=findings,
+            keywords=keywords,
+            raw_search_data=search_data,
+            status="success"
+        )
@@ -4,10 +4,15 @@ Responsible for reviewing content, fixing errors, and ensuring quality
 Uses: Groq API (free tier)
 """
 
-from groq import Groq
-from typing import Dict
+from typing import Dict, List, Tuple
 import os
+import re
+from utils.deadline import DeadlineExceeded, cancellation_status
+from utils.llm import chat_completion, create_client
 from utils.logger import agent_logger
+from utils.longform import draft_paths, iter_sections, section_words
+from utils.quality import DraftAnalyzer, format_issues, split_sections
+from utils.records import ReviewResult
 
 
 class ReviewerAgent:
@@ -19,7 +24,9 @@ class ReviewerAgent:
     def __init__(self, model: str = None):
         self.name = "Content Reviewer"
         self.model = model or os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile")
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = create_client()
+        self.skip_if_passed = os.getenv("PRE_REVIEW_SKIP", "True").lower() == "true"
+        self.analyzer = DraftAnalyzer(pass_score=int(os.getenv("PRE_REVIEW_PASS_SCORE", 90)))
 
         self.system_prompt = """You are an expert Content Reviewer, Editor, and Quality Assurance Specialist.
 
@@ -43,22 +50,91 @@ Always provide:
 1. A brief review report with identified issues
 2. The final polished version of the content"""
 
-    def review(self, topic: str, draft: str) -> Dict[str, any]:
+    def review(self, topic: str, draft: str, keywords: List[str] = None,
+               target_words: Tuple[int, int] = None, draft_path: str = None) -> ReviewResult:
         """
         Review and improve the content draft
 
+        A local pre-review runs first. Drafts that pass it skip the LLM call;
+        drafts whose issues are confined to a few sections only send those
+        sections to the LLM.
+
         Args:
             topic: The original topic
             draft: The draft content from the Writer agent
+            keywords: Research keywords to check placement and coverage against
+            target_words: (min, max) article length the writer aimed for
+            draft_path: Long-form draft file; reviewed section by section instead of ``draft``
 
         Returns:
-            Dictionary containing review feedback and final content
+            ReviewResult with review feedback and final content
         """
+        if draft_path:
+            return self.review_long(topic, draft_path)
+
         agent_logger.log_agent_start(self.name, f"Reviewing content for: {topic}")
 
         try:
-            prompt = f"""Review and improve the following content draft about "{topic}".
+            analyzer = self.analyzer
+            if target_words:
+                analyzer = DraftAnalyzer(min_words=target_words[0], max_words=target_words[1],
+                                         pass_score=self.analyzer.pass_score)
+            pre_review = analyzer.analyze(draft, [topic] + list(keywords or []))
+            agent_logger.log_tool_use(
+                "Local Pre-Review", f"score={pre_review['score']} issues={len(pre_review['issues'])}"
+            )
+
+            if pre_review["passed"] and self.skip_if_passed:
+                review_report = f"Local pre-review passed (score {pre_review['score']}/100); LLM review skipped."
+                if pre_review["issues"]:
+                    review_report += "\n\nMinor notes:\n" + format_issues(pre_review["issues"])
+                agent_logger.log_agent_complete(self.name, review_report)
+                return ReviewResult(
+                    agent=self.name,
+                    review_report=review_report,
+                    final_content=draft,
+                    pre_review=pre_review,
+                    status="success"
+                )
+
+            sections = split_sections(draft)
+            flagged = pre_review["flagged_sections"]
+            document_issues = [i for i in pre_review["issues"] if i["section"] is None]
+            if flagged and not document_issues and len(flagged) <= len(sections) // 2:
+                review_report, final_content = self._review_sections(topic, sections, pre_review["issues"])
+            else:
+                review_report, final_content = self._review_full(topic, draft, pre_review["issues"])
+
+            agent_logger.log_agent_complete(self.name, final_content[:100])
+
+            return ReviewResult(
+                agent=self.name,
+                review_report=review_report,
+                final_content=final_content,
+                pre_review=pre_review,
+                status="success"
+            )
+
+        except Exception as e:
+            agent_logger.log_agent_error(self.name, str(e))
+            return ReviewResult(
+                agent=self.name,
+                review_report=f"Review error: {str(e)}",
+                final_content=draft,
+                status=cancellation_status(e)
+            )
 
+    def _review_full(self, topic: str, draft: str, issues: List[Dict]) -> tuple:
+        """Send the whole draft to the LLM, pointing it at the issues found locally"""
+        issue_brief = ""
+        if issues:
+            issue_brief = f"""
+AUTOMATED CHECKS FLAGGED:
+{format_issues(issues)}
+"""
+
+        prompt = f"""Review and improve the following content draft about "{topic}".
+{issue_brief}
 DRAFT CONTENT:
 {draft}
 
@@ -70,42 +146,183 @@ Provide your response in EXACTLY this format:
 ### FINAL CONTENT
 [The fully polished, corrected, and improved version of the article in Markdown format]"""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=3500,
-                temperature=0.3
+        review_output = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=3500,
+            temperature=0.3,
+            stage="review"
+        )
+
+        # Parse review report and final content
+        review_report = "Review completed."
+        final_content = review_output
+
+        if "### FINAL CONTENT" in review_output:
+            parts = review_output.split("### FINAL CONTENT")
+            if len(parts) == 2:
+                review_report = parts[0].replace("### REVIEW REPORT", "").strip()
+                final_content = parts[1].strip()
+
+        return review_report, final_content
+
+    def _review_sections(self, topic: str, sections: List[str], issues: List[Dict]) -> tuple:
+        """Send only the flagged sections to the LLM and splice the fixes back in"""
+        by_section: Dict[int, List[Dict]] = {}
+        for issue in issues:
+            by_section.setdefault(issue["section"], []).append(issue)
+
+        blocks = []
+        for idx in sorted(by_section):
+            blocks.append(
+                f"<<<SECTION {idx}>>>\n"
+                f"Issues:\n{format_issues(by_section[idx])}\n\n"
+                f"{sections[idx].strip()}"
             )
+        excerpt = "\n\n".join(blocks)
 
-            review_output = response.choices[0].message.content
+        prompt = f"""The following sections of an article about "{topic}" were flagged by automated checks.
+Fix the listed issues (plus any grammar or spelling errors) in each section. Keep each section's heading.
 
-            # Parse review report and final content
-            review_report = "Review completed."
-            final_content = review_output
+{excerpt}
 
-            if "### FINAL CONTENT" in review_output:
-                parts = review_output.split("### FINAL CONTENT")
-                if len(parts) == 2:
-                    review_report = parts[0].replace("### REVIEW REPORT", "").strip()
-                    final_content = parts[1].strip()
+Provide your response in EXACTLY this format:
 
-            agent_logger.log_agent_complete(self.name, final_content[:100])
+### REVIEW REPORT
+[Briefly list what you changed.]
+
+<<<SECTION n>>>
+[The corrected section in Markdown, one block per section above, using the same section numbers]"""
+
+        review_output = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=min(3500, 2 * len(excerpt.split()) + 300),
+            temperature=0.3,
+            stage="review"
+        )
+        parts = re.split(r"<<<SECTION (\d+)>>>", review_output)
+        review_report = parts[0].replace("### REVIEW REPORT", "").strip() or "Review completed."
+
+        revised = list(sections)
+        for idx_text, body in zip(parts[1::2], parts[2::2]):
+            idx = int(idx_text)
+            if idx in by_section and body.strip():
+                trailing = sections[idx][len(sections[idx].rstrip()):]
+                revised[idx] = body.strip() + (trailing or "\n\n")
 
-            return {
-                "agent": self.name,
-                "review_report": review_report,
-                "final_content": final_content,
-                "status": "success"
-            }
+        return review_report, "".join(revised)
+
+    def review_long(self, topic: str, draft_path: str) -> ReviewResult:
+        """
+        Review a long-form draft one section at a time, streaming the result to disk
+
+        Each section gets the local section checks; only sections with issues
+        are sent to the LLM, on their own. If time runs out, the remaining
+        sections are copied unreviewed and the result is marked "partial".
+
+        Args:
+            topic: The original topic
+            draft_path: Markdown file written by ``WriterAgent.write_long``
+
+        Returns:
+            ReviewResult with review_report and final_path (reviewed Markdown file)
+        """
+        agent_logger.log_agent_start(self.name, f"Reviewing long-form content for: {topic}")
+        words = section_words()
+        analyzer = DraftAnalyzer(min_words=int(words * 0.6), max_words=int(words * 1.4))
+        _, final_path = draft_paths(topic)
+        seen: set = set()
+        notes: List[str] = []
+        reviewed = passed = 0
+        stopped = None
+
+        try:
+            with open(final_path, "w", encoding="utf-8") as out:
+                for section in iter_sections(draft_path):
+                    heading = section.splitlines()[0].lstrip("#").strip() if section.startswith("## ") else None
+                    if heading is None or stopped:
+                        out.write(section)
+                        continue
+                    issues = analyzer.analyze_section(section, seen)
+                    if not issues:
+                        passed += 1
+                        out.write(section)
+                        continue
+                    try:
+                        note, revised = self._review_one_section(topic, section, issues)
+                    except DeadlineExceeded as e:
+                        stopped = e
+                        out.write(section)
+                        continue
+                    reviewed += 1
+                    notes.append(f"- **{heading}**: {note[:200]}")
+                    out.write(revised.rstrip() + "\n\n")
+
+            summary = f"Long-form review: {reviewed} sections revised, {passed} passed local checks."
+            if stopped:
+                summary += " Review ran out of time; the remaining sections are unreviewed."
+            review_report = summary + ("\n\n" + "\n".join(notes) if notes else "")
+            agent_logger.log_agent_complete(self.name, summary)
+            return ReviewResult(
+                agent=self.name,
+                review_report=review_report,
+                final_path=final_path,
+                status="partial" if stopped else "success"
+            )
 
         except Exception as e:
             agent_logger.log_agent_error(self.name, str(e))
-            return {
-                "agent": self.name,
-                "review_report": f"Review error: {str(e)}",
-                "final_content": draft,
-                "status": "error"
-            }
+            return ReviewResult(
+                agent=self.name,
+                review_report=f"Review error: {str(e)}",
+                final_path=draft_path,
+                status=cancellation_status(e)
+            )
+
+    def _review_one_section(self, topic: str, section: str, issues: List[Dict]) -> tuple:
+        """Fix one long-form section; returns a short note and the revised section"""
+        prompt = f"""The following section of a long article about "{topic}" was flagged by automated checks:
+{format_issues(issues)}
+
+Fix these issues (plus any grammar or spelling errors). Keep the section's "##" heading,
+its length and its meaning; do not add an introduction or conclusion.
+
+SECTION:
+{section.strip()}
+
+Provide your response in EXACTLY this format:
+
+### REVIEW REPORT
+[One or two sentences on what you changed.]
+
+### FINAL CONTENT
+[The corrected section in Markdown, starting with its "##" heading]"""
+
+        review_output = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=min(3500, 2 * len(section.split()) + 300),
+            temperature=0.3,
+            stage="review"
+        )
+
+        note, revised = "Review completed.", section
+        if "### FINAL CONTENT" in review_output:
+            report, content = review_output.split("### FINAL CONTENT", 1)
+            note = " ".join(report.replace("### REVIEW REPORT", "").split()) or note
+            if content.strip().startswith("## "):
+                revised = content.strip()
+        return note, revised
@@ -4,10 +4,32 @@ Responsible for creating high-quality content drafts based on research findings
 Uses: Groq API (free tier)
 """
 
-from groq import Groq
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import contextvars
 import os
+from utils.deadline import cancellation_status
+from utils.llm import chat_completion, create_client
 from utils.logger import agent_logger
+from utils.longform import (
+    RollingSummary, demote_headings, draft_paths, is_long_form, parse_outline, section_count,
+    section_words, split_summary, strip_heading,
+)
+from utils.quality import DraftAnalyzer, DraftSelector
+from utils.records import DraftResult
+
+
+VARIANT_TEMPERATURES = (0.7, 0.9, 0.5, 1.0)
+MAX_VARIANTS = len(VARIANT_TEMPERATURES)
+
+# Shared pool for best-of-N drafts; concurrent LLM calls are still bounded by llm_call_slot
+_executor = ThreadPoolExecutor(max_workers=MAX_VARIANTS, thread_name_prefix="writer")
+
+
+def variant_models(default: str) -> List[str]:
+    """Models to rotate through for best-of-N drafts: ``default`` first, then WRITER_VARIANT_MODELS"""
+    extra = [m.strip() for m in os.getenv("WRITER_VARIANT_MODELS", "").split(",") if m.strip()]
+    return [default] + [m for m in extra if m != default]
 
 
 class WriterAgent:
@@ -19,7 +41,7 @@ class WriterAgent:
     def __init__(self, model: str = None):
         self.name = "Content Writer"
         self.model = model or os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile")
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = create_client()
 
         self.system_prompt = """You are an expert Content Writer and SEO Specialist.
 
@@ -40,21 +62,140 @@ Content Guidelines:
 
 Always create content that is valuable, original, and SEO-optimized."""
 
-    def write(self, topic: str, research_findings: str) -> Dict[str, any]:
+    DEFAULT_TARGET_WORDS = (800, 1000)
+
+    def write(self, topic: str, research_findings: str, target_words: Tuple[int, int] = None,
+              keywords: List[str] = None, variants: int = 1, models: List[str] = None) -> DraftResult:
         """
         Create a content draft based on research findings
 
+        Targets above LONGFORM_THRESHOLD words are written section by section
+        (see ``write_long``); otherwise ``variants`` > 1 writes several drafts
+        at once and keeps the best (see ``write_variants``).
+
         Args:
             topic: The main topic for the content
             research_findings: Research data from the Researcher agent
+            target_words: (min, max) article length; defaults to 800-1000 words
+            keywords: Research keywords, used for the long-form keyword plan
+                and to score best-of-N drafts
+            variants: Number of alternative drafts to write
+            models: Models to rotate the drafts through (see ``write_variants``)
 
         Returns:
-            Dictionary containing the written draft
+            DraftResult with the written draft
         """
+        if is_long_form(target_words):
+            return self.write_long(topic, research_findings, target_words, keywords)
+        if variants > 1:
+            return self.write_variants(topic, research_findings, target_words, keywords, variants, models)
+
         agent_logger.log_agent_start(self.name, f"Writing content for: {topic}")
 
+        min_words, max_words = target_words or self.DEFAULT_TARGET_WORDS
+
         try:
-            prompt = f"""Based on the following research findings, write a comprehensive, SEO-optimized article about "{topic}".
+            draft = self._draft(self._prompt(topic, research_findings, min_words, max_words),
+                                max_words, temperature=0.7, model=self.model)
+            agent_logger.log_agent_complete(self.name, draft[:100])
+
+            return DraftResult(
+                agent=self.name,
+                draft=draft,
+                status="success"
+            )
+
+        except Exception as e:
+            agent_logger.log_agent_error(self.name, str(e))
+            return DraftResult(
+                agent=self.name,
+                draft=f"Writing error: {str(e)}",
+                status=cancellation_status(e)
+            )
+
+    def write_variants(self, topic: str, research_findings: str, target_words: Tuple[int, int] = None,
+                       keywords: List[str] = None, variants: int = 2, models: List[str] = None) -> DraftResult:
+        """
+        Write several drafts concurrently and keep the best one
+
+        Variants differ in temperature and, with WRITER_VARIANT_MODELS, in model;
+        the first always uses this writer's model. At most MAX_VARIANTS are written.
+        They are scored locally by ``DraftSelector`` (structure, readability,
+        keyword coverage and overlap with the research), so the whole round
+        costs one draft's wall-clock time and no extra LLM calls.
+
+        Args:
+            topic: The main topic for the content
+            research_findings: Research data from the Researcher agent
+            target_words: (min, max) article length; defaults to 800-1000 words
+            keywords: Research keywords; drafts are scored with the topic as primary keyword
+            variants: Number of drafts to write
+            models: Models to rotate through; defaults to ``variant_models(self.model)``.
+                Budget-degraded plans pass just their model so no pricier one is used
+
+        Returns:
+            DraftResult with the winning draft and every variant's score in ``variants``
+        """
+        variants = min(variants, MAX_VARIANTS)
+        agent_logger.log_agent_start(self.name, f"Writing {variants} draft variants for: {topic}")
+
+        min_words, max_words = target_words or self.DEFAULT_TARGET_WORDS
+        prompt = self._prompt(topic, research_findings, min_words, max_words)
+        models = models or variant_models(self.model)
+        settings = [
+            (VARIANT_TEMPERATURES[i % len(VARIANT_TEMPERATURES)], models[i % len(models)])
+            for i in range(variants)
+        ]
+        # Each variant runs in a copy of this context so it keeps the run deadline and usage session
+        futures = [
+            _executor.submit(contextvars.copy_context().run, self._draft, prompt, max_words, temperature, model)
+            for temperature, model in settings
+        ]
+
+        drafts, kept, errors = [], [], []
+        for (temperature, model), future in zip(settings, futures):
+            try:
+                drafts.append(future.result())
+                kept.append((temperature, model))
+            except Exception as e:
+                agent_logger.log_agent_error(self.name, f"variant {model} @ {temperature}: {e}")
+                errors.append(e)
+
+        if not drafts:
+            return DraftResult(
+                agent=self.name,
+                draft=f"Writing error: {errors[0]}",
+                status=cancellation_status(errors[0])
+            )
+
+        selector = DraftSelector(DraftAnalyzer(min_words=min_words, max_words=max_words))
+        # Same primary keyword (the topic) as the reviewer's quality gate, so the winner passes it too
+        ranking = selector.rank(drafts, [topic] + list(keywords or []), research_findings)
+        scores = [None] * len(drafts)
+        for entry in ranking:
+            scores[entry["index"]] = entry
+        winner = ranking[0]["index"]
+        agent_logger.log_tool_use(
+            "Draft Selector",
+            f"picked variant {winner + 1}/{len(drafts)} ({kept[winner][1]} @ {kept[winner][0]}, "
+            f"score {ranking[0]['score']})"
+        )
+        agent_logger.log_agent_complete(self.name, drafts[winner][:100])
+
+        return DraftResult(
+            agent=self.name,
+            draft=drafts[winner],
+            variants=[
+                {"temperature": temperature, "model": model, "score": entry["score"],
+                 "grounding": entry["grounding"], "words": int(entry["report"]["metrics"]["words"]),
+                 "selected": i == winner}
+                for i, ((temperature, model), entry) in enumerate(zip(kept, scores))
+            ],
+            status="success"
+        )
+
+    def _prompt(self, topic: str, research_findings: str, min_words: int, max_words: int) -> str:
+        return f"""Based on the following research findings, write a comprehensive, SEO-optimized article about "{topic}".
 
 RESEARCH FINDINGS:
 {research_findings}
@@ -66,33 +207,174 @@ Write a complete article that:
 4. Uses relevant keywords naturally
 5. Has clear H2 section headings (## Section)
 6. Ends with a strong conclusion
-7. Is approximately 800-1000 words
+7. Is approximately {min_words}-{max_words} words
 
 Write the complete article now in Markdown format:"""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=3000,
-                temperature=0.7
-            )
+    def _draft(self, prompt: str, max_words: int, temperature: float, model: str) -> str:
+        return chat_completion(
+            self.client,
+            model=model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max(1200, 3 * max_words),
+            temperature=temperature,
+            stage="write"
+        )
 
-            draft = response.choices[0].message.content
-            agent_logger.log_agent_complete(self.name, draft[:100])
+    def write_long(self, topic: str, research_findings: str, target_words: Tuple[int, int],
+                   keywords: List[str] = None) -> DraftResult:
+        """
+        Write a long-form article one section at a time, streaming it to disk
+
+        An outline call assigns every H2 section a brief and its share of the
+        keywords. Each section is then written against the outline, the
+        (truncated) research and a rolling summary of recent sections, so no
+        prompt grows with the length of the article.
+
+        Args:
+            topic: The main topic for the content
+            research_findings: Research data from the Researcher agent
+            target_words: (min, max) article length
+            keywords: Research keywords to spread across the sections
+
+        Returns:
+            DraftResult with draft_path (Markdown file), outline and word_count.
+            If time runs out after some sections were written, the status is
+            "partial" and the file holds those sections
+        """
+        agent_logger.log_agent_start(self.name, f"Writing long-form content for: {topic}")
+        research = research_findings[:int(os.getenv("LONGFORM_RESEARCH_CHARS", 6000))]
+        per_section = section_words()
+        draft_path = None
+        written: List[str] = []
+        word_count = 0
 
-            return {
-                "agent": self.name,
-                "draft": draft,
-                "status": "success"
-            }
+        try:
+            title, outline = self._outline(topic, research, target_words, keywords or [])
+            draft_path, _ = draft_paths(topic)
+            with open(draft_path, "w", encoding="utf-8") as f:
+                f.write(f"# {title}\n\n")
+
+            headings = "\n".join(f"{i}. {s['heading']}" for i, s in enumerate(outline, 1))
+            summary = RollingSummary()
+            written.append(title)
+            for number, section in enumerate(outline, 1):
+                body, digest = self._write_section(
+                    topic, title, headings, research, summary.text(),
+                    section, number, len(outline), per_section
+                )
+                # Append and forget: only the digest is kept for the next section
+                with open(draft_path, "a", encoding="utf-8") as f:
+                    f.write(f"## {section['heading']}\n\n{body}\n\n")
+                summary.add(section["heading"], digest)
+                written.append(section["heading"])
+                word_count += len(body.split())
+                agent_logger.log_tool_use(
+                    "Long-Form Writer", f"section {number}/{len(outline)} done ({word_count} words so far)"
+                )
+
+            agent_logger.log_agent_complete(self.name, f"{word_count} words in {len(outline)} sections")
+            return DraftResult(
+                agent=self.name,
+                draft_path=draft_path,
+                outline=written,
+                word_count=word_count,
+                status="success"
+            )
 
         except Exception as e:
             agent_logger.log_agent_error(self.name, str(e))
-            return {
-                "agent": self.name,
-                "draft": f"Writing error: {str(e)}",
-                "status": "error"
-            }
+            if cancellation_status(e) == "timeout" and word_count:
+                # Keep the sections already written (and paid for) as a partial draft
+                return DraftResult(
+                    agent=self.name,
+                    draft_path=draft_path,
+                    outline=written,
+                    word_count=word_count,
+                    status="partial"
+                )
+            return DraftResult(
+                agent=self.name,
+                draft=f"Writing error: {str(e)}",
+                draft_path=draft_path,
+                status=cancellation_status(e)
+            )
+
+    def _outline(self, topic: str, research: str, target_words: Tuple[int, int],
+                 keywords: List[str]) -> tuple:
+        """Ask for a title and one line per H2 section with its brief and keywords"""
+        count = section_count(target_words)
+        keyword_brief = ", ".join(keywords) if keywords else "(choose relevant terms from the research)"
+        prompt = f"""Plan a {target_words[0]}-{target_words[1]} word long-form article about "{topic}".
+
+RESEARCH FINDINGS:
+{research}
+
+KEYWORDS TO COVER:
+{keyword_brief}
+
+Return ONLY the outline, in EXACTLY this format:
+# <Article title containing the main keyword>
+## <Section heading> :: <one-sentence brief of what the section covers> :: <2-4 keywords from the list>
+
+Write exactly {count} "##" lines. The first section is the introduction and the last is the
+conclusion. Sections must not overlap, and every keyword should be assigned to at least one section."""
+
+        outline_text = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=min(4000, 60 * count + 200),
+            temperature=0.5,
+            stage="write"
+        )
+        title, outline = parse_outline(outline_text)
+        if len(outline) < 2:
+            raise ValueError("The model did not return a usable outline")
+        return title or topic, outline
+
+    def _write_section(self, topic: str, title: str, headings: str, research: str, summary: str,
+                       section: Dict, number: int, total: int, words: int) -> tuple:
+        """Write one section; returns its body and a one-sentence digest for the rolling summary"""
+        role = "introduction" if number == 1 else "conclusion" if number == total else "section"
+        prompt = f"""You are writing the long-form article "{title}" about "{topic}", one section at a time.
+
+FULL OUTLINE:
+{headings}
+
+ALREADY WRITTEN (recent sections, summarized):
+{summary}
+
+RESEARCH FINDINGS:
+{research}
+
+Now write the {role} "{section['heading']}" (section {number} of {total}).
+Brief: {section['brief'] or 'cover this heading thoroughly'}
+Keywords to use naturally: {', '.join(section['keywords']) or 'none in particular'}
+
+Rules:
+- About {words} words of Markdown; use ### subheadings, lists and short paragraphs where useful
+- Do NOT repeat the "## {section['heading']}" heading and do not write other sections
+- Do not repeat points already covered above
+- End with one final line: SUMMARY: <one sentence on what this section said>"""
+
+        text = chat_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=int(words * 2.2) + 200,
+            temperature=0.7,
+            stage="write"
+        )
+        body, digest = split_summary(text)
+        # A stray "##" in the body would split the section when the draft is read back
+        return demote_headings(strip_heading(body, section["heading"])), digest
@@ -5,9 +5,21 @@ Powered by Groq (Free API) + DuckDuckGo (Free Search)
 
 import streamlit as st
 import os
+from datetime import date
+from typing import Optional
 from dotenv import load_dotenv
 from agents import ResearcherAgent, WriterAgent, ReviewerAgent
+from agents.writer import MAX_VARIANTS
 from utils.logger import agent_logger
+from utils.admission import stage_admission, AdmissionCancelled, AdmissionTimeout
+from utils.single_flight import FlightAbandoned, pipeline_flights, make_key
+from utils.usage import usage_ledger, budget_policy, usage_scope
+from utils.deadline import CancelToken, Cancelled, DeadlineExceeded, current_deadline, deadline_scope
+from utils.longform import is_long_form
+from utils.records import DraftResult, ReviewResult
+from pipeline import (STAGE_MESSAGES, STAGE_SHARES, submit_job, follow_job, skipped_review,
+                      partial_review, partial_draft, run_deadline, final_content, require_shared_store,
+                      job_timeout)
 
 # Load environment variables
 load_dotenv()
@@ -68,6 +80,8 @@ def initialize_session_state():
 
 
 def check_api_key():
+    if os.getenv("CASSETTE_MODE", "off").lower() == "replay":
+        return True  # Replaying recorded traffic needs no key
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key or api_key == "your_groq_api_key_here":
         st.error("⚠️ Please set your GROQ_API_KEY in the .env file")
@@ -87,80 +101,382 @@ def check_api_key():
     return True
 
 
-def run_multi_agent_pipeline(topic: str, model: str):
+def _queue_mode() -> bool:
+    return os.getenv("PIPELINE_MODE", "local").lower() == "queue"
+
+
+def check_pipeline_mode():
+    """Refuse to start in queue mode on a store the workers cannot see"""
+    if not _queue_mode():
+        return
+    try:
+        require_shared_store()
+    except RuntimeError as e:
+        st.error(f"⚠️ {e}")
+        st.stop()
+
+
+def _session_id() -> str:
+    """Streamlit session id of the current script thread"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else "local"
+    except ImportError:
+        return "local"
+
+
+def _session_disconnector():
+    """
+    Return a callable reporting whether the current browser session has gone away
+
+    Returns None when this Streamlit version (or a bare script run) cannot tell:
+    ``Runtime.is_active_session`` is not public API. Callers then bound queued
+    work with ADMISSION_QUEUE_TTL instead.
+    """
+    try:
+        from streamlit import runtime
+        instance = runtime.get_instance() if runtime.exists() else None
+    except Exception:
+        instance = None
+    is_active = getattr(instance, "is_active_session", None)
+    if not callable(is_active):
+        return None
+    session_id = _session_id()
+
+    def disconnected() -> bool:
+        try:
+            return not is_active(session_id)
+        except Exception:
+            return False
+
+    return disconnected
+
+
+def _admission_queue_ttl() -> float:
+    return float(os.getenv("ADMISSION_QUEUE_TTL", 600))
+
+
+def _run_stage(stage: str, key: str, work, status_text, progress_bar, progress_range: tuple):
+    """Run a stage once per identical in-flight request, sharing its result
+
+    Only the leader of a coalesced stage takes an admission slot; while it is
+    queued, its position and estimated wait are shown to it and its followers.
+
+    Raises:
+        Cancelled: If this run was superseded or ran out of time while queued
+    """
+    session_id = _session_id()
+    disconnected = _session_disconnector()
+    # Without a liveness check, a request from a closed tab is only released by the queue TTL
+    max_wait = None if disconnected else _admission_queue_ttl()
+    disconnected = disconnected or (lambda: False)
+    deadline = current_deadline()
+
+    def stopped() -> bool:
+        return disconnected() or deadline.cancelled or deadline.expired()
+    low, high = progress_range
+    first_position = []
+
+    def run(publish):
+        def on_wait(position: int, eta: float):
+            first_position.append(position)
+            advanced = (first_position[0] - position + 1) / (first_position[0] + 1)
+            progress_bar.progress(int(low + (high - low) * advanced))
+            publish(f"⏳ Queued: position {position}, estimated wait ~{eta:.0f}s")
+
+        with stage_admission.admit(session_id, on_wait=on_wait, is_cancelled=stopped, max_wait=max_wait):
+            publish(STAGE_MESSAGES[stage])
+            return work()
+
+    while True:
+        try:
+            result, shared = pipeline_flights.do(key, run, on_event=status_text.text)
+        except AdmissionTimeout:
+            raise
+        except FlightAbandoned:
+            # The leader's own session was stopped or rerun; take over the stage
+            deadline.check()
+            continue
+        except AdmissionCancelled:
+            deadline.check()
+            # A leader we followed disconnected while queued; retry as leader ourselves
+            if disconnected():
+                raise
+            continue
+        # A shared result cancelled by its leader's newer run is no answer for us
+        if not (shared and result.status == "cancelled" and not deadline.cancelled):
+            break
+    if shared:
+        agent_logger.log_tool_use("Single-Flight", f"Joined in-flight {stage} run")
+    return result
+
+
+def _raise_if_stopped(stage_results):
+    """Turn a stage that ran out of time or was cancelled into the matching exception"""
+    if stage_results.status == "timeout":
+        raise DeadlineExceeded(f"{stage_results.agent} ran out of time")
+    if stage_results.status == "cancelled":
+        raise Cancelled(f"{stage_results.agent} was cancelled")
+
+
+def _start_run() -> CancelToken:
+    """Cancel this session's previous run (if still going) and return a token for the new one"""
+    previous = st.session_state.get("run_token")
+    if previous is not None:
+        previous.cancel()
+    token = CancelToken()
+    st.session_state.run_token = token
+    return token
+
+
+def run_multi_agent_pipeline(topic: str, model: str, target_words: tuple = None, variants: int = 1):
     """Orchestrate the multi-agent pipeline"""
+    session_id = _session_id()
+    plan = budget_policy.preflight(session_id, model, target_words, variants)
+    if not plan["allowed"]:
+        st.error(f"❌ {plan['degraded'][0]}")
+        return
+    for note in plan["degraded"]:
+        st.info(f"💡 {note}")
+
+    if _queue_mode():
+        # Queued runs may be shared with other sessions, so they are bounded by JOB_TIMEOUT but never cancelled
+        _run_queued(topic, plan["model"], plan, session_id)
+        return
+    deadline = run_deadline(_start_run(), long_form=is_long_form(plan["target_words"]))
+    try:
+        with usage_scope(session_id):
+            _run_pipeline(topic, plan["model"], plan, deadline)
+    except DeadlineExceeded:
+        st.error("⏱️ The run did not finish within its time limit (RUN_DEADLINE / LONGFORM_RUN_DEADLINE). "
+                 "Please try again.")
+    except AdmissionTimeout:
+        st.error("⏳ The studio is busy and this run waited too long in the queue. Please try again shortly.")
+    except (AdmissionCancelled, Cancelled):
+        # Browser session went away or a newer run replaced this one; nobody is left to render for
+        agent_logger.log_tool_use("Admission Control", "Run cancelled before it finished")
+
+
+def _run_pipeline(topic: str, model: str, plan: dict, deadline):
 
     progress_bar = st.progress(0)
     status_text = st.empty()
 
     # ── Phase 1: Research ──────────────────────────────────────
-    status_text.text("🔍 Phase 1/3: Researching topic (DuckDuckGo - Free)...")
+    status_text.text(STAGE_MESSAGES["research"])
     progress_bar.progress(10)
 
-    with st.spinner("🔍 Researcher Agent is searching the internet..."):
-        researcher = ResearcherAgent(model=model)
-        research_results = researcher.research(topic)
+    with st.spinner("🔍 Researcher Agent is searching the internet..."), \
+            deadline_scope(deadline.child(STAGE_SHARES["research"])):
+        research_results = _run_stage(
+            "research",
+            make_key("research", topic, model),
+            lambda: ResearcherAgent(model=model).research(topic),
+            status_text,
+            progress_bar,
+            (0, 10),
+        )
         progress_bar.progress(33)
 
-    if research_results.get("status") != "success":
-        st.error(f"❌ Research failed: {research_results.get('findings')}")
+    _raise_if_stopped(research_results)
+    if research_results.status != "success":
+        st.error(f"❌ Research failed: {research_results.findings}")
         return
 
     with st.expander("📊 Research Findings", expanded=False):
-        st.markdown(research_results.get("findings", ""))
+        st.markdown(research_results.findings)
 
     # ── Phase 2: Writing ───────────────────────────────────────
-    status_text.text("✍️ Phase 2/3: Writing content (Groq LLM - Free)...")
+    status_text.text(STAGE_MESSAGES["write"])
     progress_bar.progress(40)
 
-    with st.spinner("✍️ Writer Agent is crafting content..."):
-        writer = WriterAgent(model=model)
-        writing_results = writer.write(
-            topic=topic,
-            research_findings=research_results.get("findings", "")
+    with st.spinner("✍️ Writer Agent is crafting content..."), \
+            deadline_scope(deadline.child(STAGE_SHARES["write"])):
+        findings = research_results.findings
+        target_words = plan["target_words"]
+        variants = plan.get("variants", 1)
+        models = plan.get("variant_models")
+        writing_results = _run_stage(
+            "write",
+            make_key("write", topic, model, findings, target_words, variants, models),
+            lambda: WriterAgent(model=model).write(
+                topic=topic, research_findings=findings, target_words=target_words,
+                keywords=research_results.keywords, variants=variants, models=models
+            ),
+            status_text,
+            progress_bar,
+            (33, 40),
         )
         progress_bar.progress(66)
 
-    if writing_results.get("status") != "success":
-        st.error(f"❌ Writing failed: {writing_results.get('draft')}")
+    _raise_if_stopped(writing_results)
+    if writing_results.status not in ("success", "partial"):
+        st.error(f"❌ Writing failed: {writing_results.draft}")
         return
 
-    with st.expander("📝 Content Draft", expanded=False):
-        st.markdown(writing_results.get("draft", ""))
+    _render_draft(writing_results)
 
     # ── Phase 3: Review ────────────────────────────────────────
-    status_text.text("📋 Phase 3/3: Reviewing and polishing (Groq LLM - Free)...")
-    progress_bar.progress(75)
-
-    with st.spinner("📋 Reviewer Agent is polishing the content..."):
-        reviewer = ReviewerAgent(model=model)
-        review_results = reviewer.review(
-            topic=topic,
-            draft=writing_results.get("draft", "")
-        )
+    draft = writing_results.draft or ""
+    draft_path = writing_results.draft_path
+    if writing_results.status == "partial":
+        # Long-form draft cut short by the deadline: show the sections written so far
+        review_results = partial_draft(writing_results)
+        progress_bar.progress(100)
+    elif plan["skip_review"]:
+        review_results = skipped_review(draft, "token budget is low", draft_path)
+        progress_bar.progress(100)
+    else:
+        status_text.text(STAGE_MESSAGES["review"])
+        progress_bar.progress(75)
+
+        with st.spinner("📋 Reviewer Agent is polishing the content..."), \
+                deadline_scope(deadline.child(STAGE_SHARES["review"])):
+            keywords = research_results.keywords
+            review_results = _run_stage(
+                "review",
+                make_key("review", topic, model, draft, draft_path, keywords, target_words),
+                lambda: ReviewerAgent(model=model).review(
+                    topic=topic, draft=draft, keywords=keywords, target_words=target_words,
+                    draft_path=draft_path
+                ),
+                status_text,
+                progress_bar,
+                (66, 75),
+            )
+            progress_bar.progress(100)
+        if review_results.status in ("timeout", "cancelled"):
+            review_results = partial_review(draft, review_results.status, draft_path)
+
+    status_text.text(_completion_message(review_results.status))
+    _render_final(topic, review_results)
+
+
+def _run_queued(topic: str, model: str, plan: dict, session_id: str):
+    """Hand the run to the worker pool and render its results (PIPELINE_MODE=queue)"""
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    stage_progress = {
+        STAGE_MESSAGES["research"]: 10,
+        STAGE_MESSAGES["write"]: 40,
+        STAGE_MESSAGES["review"]: 75,
+    }
+
+    def on_event(event: str):
+        status_text.text(event)
+        if event in stage_progress:
+            progress_bar.progress(stage_progress[event])
+
+    def on_wait(position: int, eta: float):
+        status_text.text(f"⏳ Queued: position {position}, estimated wait ~{eta:.0f}s")
+
+    status_text.text("📨 Queued for the worker pool...")
+    progress_bar.progress(5)
+
+    disconnected = _session_disconnector()
+    max_wait = None if disconnected else _admission_queue_ttl()
+    with st.spinner("🤖 Worker pool is running the agents..."):
+        try:
+            # Sessions take turns submitting; worker concurrency bounds the actual work, so
+            # following a job holds no slot and a UI replica can follow any number of runs
+            with stage_admission.admit(session_id, on_wait=on_wait, is_cancelled=disconnected,
+                                       max_wait=max_wait):
+                job_id = submit_job(topic, model, plan, session_id)
+            results = follow_job(job_id, on_event=on_event, timeout=job_timeout(plan))
+        except TimeoutError as e:
+            st.error(f"❌ {e}. Please try again.")
+            return
+        except AdmissionTimeout:
+            st.error("⏳ The studio is busy and this run waited too long in the queue. Please try again shortly.")
+            return
+        except AdmissionCancelled:
+            agent_logger.log_tool_use("Admission Control", "Queued run cancelled before it was submitted")
+            return
         progress_bar.progress(100)
 
-    status_text.text("✅ All phases completed successfully!")
+    if results.error is not None:
+        st.error(f"❌ Pipeline failed: {results.error}")
+        return
+
+    research_results = results.research
+    if research_results is None or research_results.status != "success":
+        st.error(f"❌ Research failed: {research_results.findings if research_results else results.status}")
+        return
+
+    with st.expander("📊 Research Findings", expanded=False):
+        st.markdown(research_results.findings)
+
+    writing_results = results.writing
+    if writing_results is None or writing_results.status not in ("success", "partial"):
+        st.error(f"❌ Writing failed: {writing_results.draft if writing_results else results.status}")
+        return
+
+    _render_draft(writing_results)
+
+    review_results = results.review
+    status_text.text(_completion_message(results.status or (review_results and review_results.status)))
+    _render_final(topic, review_results)
+
+
+def _completion_message(status: str) -> str:
+    """Status line for a finished run, from its overall (or review) status"""
+    if status == "success":
+        return "✅ All phases completed successfully!"
+    if status == "partial":
+        return "⚠️ Finished without a complete review; showing the unreviewed draft."
+    if status == "timeout":
+        return "⏱️ The run ran out of time before it finished."
+    if status == "cancelled":
+        return "⏹️ The run was cancelled."
+    return "❌ The review stage failed."
+
+
+def _render_draft(writing_results: DraftResult):
+    """Show the writer's draft (the outline for long-form drafts, which live on disk) and variant scores"""
+    with st.expander("📝 Content Draft", expanded=False):
+        if writing_results.draft_path:
+            st.caption(f"Long-form draft: {writing_results.word_count or 0} words, "
+                       f"saved to {writing_results.draft_path}")
+            outline = writing_results.outline or []
+            st.markdown("\n".join([f"**{outline[0]}**"] + [f"- {h}" for h in outline[1:]]) if outline else "")
+        else:
+            variants = writing_results.variants
+            if variants:
+                st.caption("Best-of-N: " + " · ".join(
+                    f"{'**' if v['selected'] else ''}{v['model']} @ {v['temperature']}: "
+                    f"{v['score']}{'**' if v['selected'] else ''}"
+                    for v in variants
+                ))
+            st.markdown(writing_results.draft or "")
+
+
+def _render_final(topic: str, review_results: Optional[ReviewResult]):
+    """Show the reviewed content with download buttons"""
 
     # ── Final Output ───────────────────────────────────────────
     st.markdown("---")
     st.markdown("<h2 style='text-align: center; color: #6366f1;'>🎉 Final Content Ready!</h2>",
                 unsafe_allow_html=True)
 
-    if review_results.get("status") == "success":
-        with st.expander("📋 Review Report", expanded=False):
-            st.markdown(review_results.get("review_report", ""))
+    if review_results is not None and review_results.status in ("success", "partial"):
+        if review_results.status == "partial":
+            st.warning(f"⚠️ {review_results.review_report}")
+        else:
+            with st.expander("📋 Review Report", expanded=False):
+                st.markdown(review_results.review_report)
 
         st.markdown("### ✨ Final Polished Content:")
         st.markdown("---")
-        final_content = review_results.get("final_content", "")
-        st.markdown(final_content)
+        content = final_content(review_results)
+        st.markdown(content)
 
         col1, col2 = st.columns(2)
         with col1:
             st.download_button(
                 label="📥 Download as Markdown",
-                data=final_content,
+                data=content,
                 file_name=f"{topic.replace(' ', '_')}.md",
                 mime="text/markdown",
                 use_container_width=True
@@ -168,7 +484,7 @@ def run_multi_agent_pipeline(topic: str, model: str):
         with col2:
             st.download_button(
                 label="📄 Download as Text",
-                data=final_content,
+                data=content,
                 file_name=f"{topic.replace(' ', '_')}.txt",
                 mime="text/plain",
                 use_container_width=True
@@ -182,6 +498,7 @@ def run_multi_agent_pipeline(topic: str, model: str):
 def main():
     initialize_session_state()
     check_api_key()
+    check_pipeline_mode()
 
     # ── Header ─────────────────────────────────────────────────
     st.markdown("<h1 class='main-header'>🤖 Multi-Agent Content Studio</h1>", unsafe_allow_html=True)
@@ -215,6 +532,26 @@ def main():
             help="All models are FREE on Groq!"
         )
 
+        length_option = st.radio(
+            "📏 Article Length",
+            ["Standard (800-1000 words)", "Long-form"],
+            index=0,
+            help="Long-form articles are written and reviewed section by section"
+        )
+        target_words = None
+        if length_option == "Long-form":
+            words = st.number_input("Target words", min_value=3000, max_value=20000, value=10000, step=1000)
+            target_words = (int(words * 0.9), int(words))
+
+        variants = st.slider(
+            "🏆 Best-of-N drafts",
+            min_value=1,
+            max_value=MAX_VARIANTS,
+            value=min(MAX_VARIANTS, max(1, int(os.getenv("WRITER_VARIANTS", 1)))),
+            help="Write several drafts at once and review only the best-scoring one (standard length only)",
+            disabled=target_words is not None,
+        )
+
         st.markdown("---")
         st.markdown("""
         <div class='free-info'>
@@ -245,6 +582,19 @@ def main():
 - Polishes final output
         """)
 
+        st.markdown("---")
+        with st.expander("📊 Token Usage (today)", expanded=False):
+            today = usage_ledger.rollup(by=("stage", "model"), day=date.today().isoformat())
+            if today:
+                st.dataframe(today, use_container_width=True, hide_index=True)
+                st.caption(f"This session: {usage_ledger.tokens_used(session=_session_id()):,} tokens")
+            else:
+                st.caption("No LLM calls recorded today.")
+
+        cassette_mode = os.getenv("CASSETTE_MODE", "off").lower()
+        if cassette_mode in ("record", "replay"):
+            st.warning(f"📼 Cassette {cassette_mode}: `{os.getenv('CASSETTE_PATH', 'cassettes/session.jsonl.gz')}`")
+
         st.markdown("---")
         # API Status
         if os.getenv("GROQ_API_KEY") and os.getenv("GROQ_API_KEY") != "your_groq_api_key_here":
@@ -320,7 +670,7 @@ def main():
             st.warning("⚠️ Please enter a topic first!")
         else:
             st.markdown("---")
-            run_multi_agent_pipeline(topic.strip(), model_option)
+            run_multi_agent_pipeline(topic.strip(), model_option, target_words, variants)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""
+Serialization benchmark: ad-hoc dicts + JSON vs typed records + pack/unpack
+Run from the project root:  python benchmarks/bench_serialization.py [--runs 2000]
+Times a round trip (encode + decode) of a pipeline run record and of a batch
+of search hits, and compares encoded size and in-memory size of search hits
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.records as records  # noqa: E402
+from utils.records import (  # noqa: E402
+    DraftResult, ResearchResult, ReviewResult, RunRecord, SearchHit, pack, unpack,
+)
+
+
+def _text(words: int, seed: str) -> str:
+    sentence = f"{seed} adoption keeps growing as teams measure results and share what works. "
+    return (sentence * (words // 12 + 1))[: words * 7]
+
+
+def sample_run() -> dict:
+    """A typical run: ~2k words of research, a 1k-word draft and its reviewed version"""
+    return {
+        "topic": "AI in healthcare",
+        "model": "llama-3.3-70b-versatile",
+        "status": "success",
+        "research": {
+            "agent": "SEO Researcher",
+            "findings": _text(1200, "Research"),
+            "keywords": [f"keyword {i}" for i in range(15)],
+            "raw_search_data": _text(800, "Search"),
+            "status": "success",
+        },
+        "writing": {"agent": "Content Writer", "draft": _text(1000, "Draft"), "status": "success"},
+        "review": {
+            "agent": "Content Reviewer",
+            "review_report": _text(120, "Report"),
+            "final_content": _text(1000, "Final"),
+            "status": "success",
+        },
+    }
+
+
+def sample_hits(count: int) -> list:
+    return [
+        {"title": f"Result {i} about AI in healthcare", "link": f"https://example.com/articles/{i}",
+         "snippet": _text(40, f"Snippet {i}")}
+        for i in range(count)
+    ]
+
+
+def to_records(run: dict) -> RunRecord:
+    return RunRecord(
+        topic=run["topic"], model=run["model"], status=run["status"],
+        research=ResearchResult(**run["research"]),
+        writing=DraftResult(**run["writing"]),
+        review=ReviewResult(**run["review"]),
+    )
+
+
+def bench(label: str, value, encode, decode, runs: int) -> dict:
+    encoded = encode(value)
+    started = time.perf_counter()
+    for _ in range(runs):
+        decode(encode(value))
+    elapsed = time.perf_counter() - started
+    return {"case": label, "bytes": len(encoded), "us": elapsed / runs * 1e6}
+
+
+def json_encode(value) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def json_decode(data: bytes):
+    return json.loads(data)
+
+
+def allocated(build) -> int:
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000, help="Round trips per case")
+    parser.add_argument("--hits", type=int, default=500, help="Search hits in the batch case")
+    args = parser.parse_args()
+
+    run = sample_run()
+    hits = sample_hits(args.hits)
+    run_record = to_records(run)
+    hit_records = [SearchHit(**h) for h in hits]
+
+    codecs = [("dict + json", json_encode, json_decode, False)]
+    if records.msgpack is not None:
+        codecs.append(("record + msgpack", pack, unpack, True))
+    else:
+        print("msgpack is not installed; only the JSON fallback is measured (pip install msgpack)\n")
+
+    def json_fallback(fn):
+        def call(value):
+            saved, records.msgpack = records.msgpack, None
+            try:
+                return fn(value)
+            finally:
+                records.msgpack = saved
+        return call
+
+    codecs.append(("record + json fallback", json_fallback(pack), json_fallback(unpack), True))
+
+    rows = []
+    for name, encode, decode, typed in codecs:
+        rows.append(bench(f"run record  | {name}", run_record if typed else run, encode, decode, args.runs))
+    for name, encode, decode, typed in codecs:
+        rows.append(bench(f"{args.hits} hits    | {name}", hit_records if typed else hits, encode, decode,
+                          max(1, args.runs // 10)))
+
+    print(f"{'case':<44} {'bytes':>10} {'round trip':>14}")
+    for row in rows:
+        print(f"{row['case']:<44} {row['bytes']:>10,} {row['us']:>11,.1f} us")
+
+    dict_bytes = allocated(lambda: [dict(h) for h in hits])
+    record_bytes = allocated(lambda: [SearchHit(**h) for h in hits])
+    print(f"\nIn memory, {args.hits} hits (excluding shared strings): "
+          f"dicts {dict_bytes:,} B, records {record_bytes:,} B")
+
+
+if __name__ == "__main__":
+    main()
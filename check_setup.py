@@ -34,6 +34,7 @@ def check_dependencies():
         'requests': 'Requests',
         'loguru': 'Loguru Logger',
         'pydantic': 'Pydantic',
+        'numpy': 'NumPy',
     }
 
     all_ok = True
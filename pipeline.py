@@ -0,0 +1,415 @@
+"""
+Headless pipeline orchestration (Research → Write → Review)
+Shared by the worker pool (worker.py) and the Streamlit UI in PIPELINE_MODE=queue,
+which hands runs to workers through the shared store (see utils/store.py)
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from agents import ResearcherAgent, WriterAgent, ReviewerAgent
+from agents.writer import MAX_VARIANTS
+from utils.deadline import Deadline, deadline_scope
+from utils.longform import is_long_form, read_text
+from utils.records import DraftResult, ResearchResult, ReviewResult, RunRecord
+from utils.single_flight import make_key
+from utils.store import SharedStore, get_store
+from utils.usage import usage_scope
+
+
+STAGE_MESSAGES = {
+    "research": "🔍 Phase 1/3: Researching topic (DuckDuckGo - Free)...",
+    "write": "✍️ Phase 2/3: Writing content (Groq LLM - Free)...",
+    "review": "📋 Phase 3/3: Reviewing and polishing (Groq LLM - Free)...",
+}
+
+JOB_QUEUE = "pipeline:jobs"
+
+# Share of the run's remaining time each stage may use; later stages get what earlier ones leave
+STAGE_SHARES = {"research": 0.35, "write": 0.6, "review": 1.0}
+
+
+def job_timeout(plan: Dict = None) -> float:
+    """
+    Seconds a queued run may take from submission to result
+
+    JOB_TIMEOUT, or LONGFORM_JOB_TIMEOUT for long-form plans, which must exceed
+    LONGFORM_RUN_DEADLINE or long articles would be cut off partway through.
+    """
+    if is_long_form((plan or {}).get("target_words")):
+        return float(os.getenv("LONGFORM_JOB_TIMEOUT", 2100))
+    return float(os.getenv("JOB_TIMEOUT", 900))
+
+
+def _result_ttl() -> float:
+    return float(os.getenv("RESULT_TTL", 600))
+
+
+def _heartbeat_ttl() -> float:
+    return float(os.getenv("JOB_HEARTBEAT_TTL", 30))
+
+
+def require_shared_store(store: SharedStore = None) -> SharedStore:
+    """
+    The store queue mode runs on, checked to be visible to other processes
+
+    Raises:
+        RuntimeError: If SHARED_STORE_URL is process-local (memory://), where
+            no worker would ever see the queued jobs
+    """
+    store = store or get_store()
+    if not store.shared:
+        raise RuntimeError(
+            "PIPELINE_MODE=queue needs a SHARED_STORE_URL that workers can reach "
+            "(sqlite:///path/on/shared/volume.db or redis://...); memory:// is private to this process"
+        )
+    return store
+
+
+def run_deadline(token=None, long_form: bool = False) -> Deadline:
+    """Overall deadline for one run (RUN_DEADLINE, or LONGFORM_RUN_DEADLINE seconds; 0 = unbounded)"""
+    if long_form:
+        seconds = float(os.getenv("LONGFORM_RUN_DEADLINE", 1800))
+    else:
+        seconds = float(os.getenv("RUN_DEADLINE", 300))
+    return Deadline(seconds if seconds > 0 else None, token=token)
+
+
+def _review_of(draft: str, draft_path: str, report: str, status: str) -> ReviewResult:
+    if draft_path:
+        return ReviewResult(agent="Content Reviewer", review_report=report, final_path=draft_path, status=status)
+    return ReviewResult(agent="Content Reviewer", review_report=report, final_content=draft, status=status)
+
+
+def skipped_review(draft: str, reason: str, draft_path: str = None) -> ReviewResult:
+    """Review result used when the review stage is skipped by a budget plan"""
+    return _review_of(draft, draft_path, f"Review skipped: {reason}", "success")
+
+
+def partial_review(draft: str, status: str, draft_path: str = None) -> ReviewResult:
+    """Review result used when the review stage timed out or was cancelled"""
+    reason = "ran out of time" if status == "timeout" else "was cancelled"
+    return _review_of(draft, draft_path, f"Review {reason}; showing the unreviewed draft.", "partial")
+
+
+def partial_draft(writing: DraftResult) -> ReviewResult:
+    """Review result for a long-form draft cut short by the deadline: the sections written so far"""
+    report = (f"Writing ran out of time after {writing.word_count or 0:,} words; "
+              "showing the sections written so far, unreviewed.")
+    return _review_of(writing.draft or "", writing.draft_path, report, "partial")
+
+
+def final_content(review: ReviewResult) -> str:
+    """Reviewed article text, reading long-form output from its file"""
+    if review.final_path:
+        return read_text(review.final_path)
+    return review.final_content or ""
+
+
+def run_pipeline(topic: str, model: str, on_event: Callable[[str], None] = None,
+                 plan: Dict = None, deadline: Deadline = None,
+                 research: ResearchResult = None) -> RunRecord:
+    """
+    Run all three agents without any UI
+
+    Args:
+        topic: The content topic
+        model: Groq model name
+        on_event: Called with a status message as each stage starts
+        plan: Budget plan from ``budget_policy.preflight`` (target_words, variants,
+            variant_models, skip_review); targets above LONGFORM_THRESHOLD words run in long-form
+            mode, where the draft and final article are files (draft_path / final_path)
+        deadline: Overall run deadline; defaults to ``run_deadline()``
+        research: Research already done for this topic (e.g. by
+            ``ResearcherAgent.research_batch``); skips the research stage
+
+    Returns:
+        RunRecord with the research, writing and review results reached, plus
+        the overall status ("success", "partial", "timeout", "cancelled" or "error")
+    """
+    emit = on_event or (lambda event: None)
+    plan = plan or {}
+    deadline = deadline or run_deadline(long_form=is_long_form(plan.get("target_words")))
+    run = RunRecord(topic=topic, model=model)
+
+    def stage(name: str, work: Callable[[], Any]) -> Any:
+        # Agents report running out of time or being cancelled through their result status
+        with deadline_scope(deadline.child(STAGE_SHARES[name])):
+            return work()
+
+    if research is None:
+        emit(STAGE_MESSAGES["research"])
+        research = stage("research", lambda: ResearcherAgent(model=model).research(topic))
+    run.research = research
+    if run.research.status != "success":
+        run.status = run.research.status
+        return run
+
+    emit(STAGE_MESSAGES["write"])
+    run.writing = stage("write", lambda: WriterAgent(model=model).write(
+        topic=topic,
+        research_findings=run.research.findings,
+        target_words=plan.get("target_words"),
+        keywords=run.research.keywords,
+        variants=plan.get("variants", 1),
+        models=plan.get("variant_models")
+    ))
+    if run.writing.status == "partial":
+        # Out of time partway through a long-form draft: there is no time left to review it
+        run.review = partial_draft(run.writing)
+        run.status = "partial"
+        return run
+    if run.writing.status != "success":
+        run.status = run.writing.status
+        return run
+
+    draft = run.writing.draft or ""
+    draft_path = run.writing.draft_path
+    if plan.get("skip_review"):
+        run.review = skipped_review(draft, "token budget is low", draft_path)
+        run.status = "success"
+        return run
+
+    emit(STAGE_MESSAGES["review"])
+    review = stage("review", lambda: ReviewerAgent(model=model).review(
+        topic=topic,
+        draft=draft,
+        keywords=run.research.keywords,
+        target_words=plan.get("target_words"),
+        draft_path=draft_path
+    ))
+    if review.status in ("timeout", "cancelled"):
+        review = partial_review(draft, review.status, draft_path)
+    run.review = review
+    run.status = review.status
+    return run
+
+
+def submit_job(topic: str, model: str, plan: Dict = None, session: str = "local",
+               store: SharedStore = None) -> str:
+    """
+    Queue a pipeline run for the worker pool
+
+    Identical topic/model requests submitted while a run is queued or running
+    attach to that run instead of queueing another. Once a worker picks the run
+    up it keeps the in-flight entry alive with a heartbeat, so a crashed worker
+    releases it within JOB_HEARTBEAT_TTL seconds.
+
+    Returns:
+        Job id to pass to ``follow_job``
+
+    Raises:
+        RuntimeError: If the store is not shared with the workers
+    """
+    store = require_shared_store(store)
+    plan = plan or {}
+    timeout = job_timeout(plan)
+    run_key = make_key("pipeline", topic, model, plan.get("target_words"),
+                       plan.get("variants", 1), plan.get("skip_review"))
+    inflight_key = f"inflight:{run_key}"
+    for _ in range(3):
+        job_id = uuid.uuid4().hex
+        if store.set_if_absent(inflight_key, job_id, ttl=timeout):
+            store.push(JOB_QUEUE, {
+                "id": job_id,
+                "topic": topic,
+                "model": model,
+                "plan": plan,
+                "session": session,
+                "inflight_key": inflight_key,
+                "submitted_at": time.time(),
+                "timeout": timeout,
+            })
+            return job_id
+        existing = store.get(inflight_key)
+        if existing:
+            return existing
+    raise RuntimeError("Could not submit pipeline job")
+
+
+def follow_job(job_id: str, on_event: Callable[[str], None] = None,
+               store: SharedStore = None, poll_interval: float = 1.0, timeout: float = None) -> RunRecord:
+    """
+    Wait for a queued run, replaying its status events on the caller's thread
+
+    Args:
+        timeout: Seconds to wait; defaults to ``job_timeout()`` (pass the
+            run's plan to it for long-form runs)
+
+    Raises:
+        TimeoutError: If no result arrives in time, or the worker running the
+            job stops sending heartbeats
+    """
+    store = store or get_store()
+    deadline = time.time() + (timeout or job_timeout())
+    seen = 0
+    started = False
+    while True:
+        events = store.read_list(f"job:{job_id}:events", seen)
+        seen += len(events)
+        if on_event:
+            for event in events:
+                on_event(event)
+        result = store.get(f"job:{job_id}:result")
+        if result is not None:
+            # Results published before runs were records arrive as plain dicts
+            return result if isinstance(result, RunRecord) else RunRecord.from_dict(result)
+        if store.get(f"job:{job_id}:heartbeat") is not None:
+            started = True
+        elif started and store.get(f"job:{job_id}:result") is None:
+            raise TimeoutError(f"The worker running pipeline job {job_id} stopped responding")
+        if time.time() > deadline:
+            raise TimeoutError(f"Pipeline job {job_id} did not finish in time")
+        time.sleep(poll_interval)
+
+
+def process_job(job: Dict, store: SharedStore = None) -> Optional[RunRecord]:
+    """Run one queued job and publish its events and result to the store"""
+    store = store or get_store()
+    job_id = job["id"]
+    timeout = job.get("timeout") or job_timeout(job.get("plan"))
+    if time.time() - job.get("submitted_at", time.time()) > timeout:
+        logger.warning(f"Dropping expired job {job_id}")
+        return None
+
+    def publish(event: str):
+        store.append(f"job:{job_id}:events", event, ttl=_result_ttl())
+
+    # Followers stop waiting job_timeout() after submission, so the run must not outlive that
+    deadline = run_deadline(long_form=is_long_form((job.get("plan") or {}).get("target_words")))
+    job_expires_at = job.get("submitted_at", time.time()) + timeout
+    if deadline.expires_at is None or deadline.expires_at > job_expires_at:
+        deadline = Deadline(expires_at=job_expires_at)
+
+    stop_heartbeat = _start_heartbeat(job, store)
+    try:
+        try:
+            with usage_scope(job.get("session", "worker")):
+                results = run_pipeline(job["topic"], job["model"], on_event=publish,
+                                       plan=job.get("plan"), deadline=deadline)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            results = RunRecord(topic=job["topic"], model=job["model"], status="error", error=str(e))
+        # Published before the heartbeat stops, so followers never see a finished job as dead
+        store.set(f"job:{job_id}:result", results, ttl=_result_ttl())
+    finally:
+        stop_heartbeat()
+    if store.get(job["inflight_key"]) == job_id:
+        store.delete(job["inflight_key"])
+    return results
+
+
+def _start_heartbeat(job: Dict, store: SharedStore) -> Callable[[], None]:
+    """
+    Keep a running job's in-flight entry alive on short TTLs
+
+    The in-flight key is renewed only while it still names this job, and
+    followers treat a lapsed ``job:<id>:heartbeat`` as a dead worker.
+
+    Returns:
+        Callable that stops the heartbeat
+    """
+    job_id = job["id"]
+    ttl = _heartbeat_ttl()
+    stopped = threading.Event()
+
+    def beat():
+        if store.get(job["inflight_key"]) in (job_id, None):
+            store.set(job["inflight_key"], job_id, ttl=ttl)
+        store.set(f"job:{job_id}:heartbeat", time.time(), ttl=ttl)
+
+    def run():
+        while not stopped.wait(ttl / 3):
+            try:
+                beat()
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    beat()
+    threading.Thread(target=run, name=f"heartbeat-{job_id[:8]}", daemon=True).start()
+
+    def stop():
+        stopped.set()
+        store.delete(f"job:{job_id}:heartbeat")
+
+    return stop
+
+
+def main():
+    """Batch runner: python pipeline.py "Topic A" "Topic B" [--record|--replay cassette.jsonl.gz]"""
+    import argparse
+    import re
+    import shutil
+    from contextlib import nullcontext
+
+    from dotenv import load_dotenv
+
+    from utils.cassette import use_cassette
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the content pipeline headless for one or more topics")
+    parser.add_argument("topics", nargs="*", help="Topics to write about")
+    parser.add_argument("--file", help="Text file with one topic per line")
+    parser.add_argument("--model", default=os.getenv("DEFAULT_MODEL", "llama-3.3-70b-versatile"))
+    parser.add_argument("--out", default="output", help="Directory for the generated Markdown")
+    parser.add_argument("--words", type=int,
+                        help="Target article length; above LONGFORM_THRESHOLD the article is written section by section")
+    parser.add_argument("--variants", type=int, default=int(os.getenv("WRITER_VARIANTS", 1)),
+                        help="Write this many drafts concurrently and review only the best one")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE", help="Record all LLM/search traffic")
+    cassette_group.add_argument("--replay", metavar="CASSETTE", help="Replay recorded traffic offline")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed multiplier (1 = recorded timing, 0 = instant)")
+    args = parser.parse_args()
+
+    topics = list(args.topics)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            topics.extend(line.strip() for line in f if line.strip())
+    if not topics:
+        parser.error("Provide at least one topic or --file")
+
+    if args.record:
+        cassette = use_cassette(args.record, "record")
+    elif args.replay:
+        cassette = use_cassette(args.replay, "replay", args.speed)
+    else:
+        cassette = nullcontext()
+
+    plan = {"variants": min(MAX_VARIANTS, max(1, args.variants))}
+    if args.words:
+        plan["target_words"] = (int(args.words * 0.9), args.words)
+    os.makedirs(args.out, exist_ok=True)
+    with cassette, usage_scope("batch"):
+        # One vectorized keyword pass over every topic's search results; each topic's
+        # search and analysis get the research share of a fresh run deadline
+        logger.info(f"Researching {len(topics)} topic(s)...")
+        long_form = is_long_form(plan.get("target_words"))
+        researched = ResearcherAgent(model=args.model).research_batch(
+            topics, lambda: run_deadline(long_form=long_form).child(STAGE_SHARES["research"])
+        )
+        for topic, research in zip(topics, researched):
+            started = time.time()
+            run = run_pipeline(topic, args.model, on_event=logger.info, plan=plan, research=research)
+            review = run.review
+            status = run.status or "incomplete"
+            if review and (review.final_content or review.final_path):
+                path = os.path.join(args.out, re.sub(r"[^\w\-]+", "_", topic).strip("_") + ".md")
+                if review.final_path:
+                    shutil.copyfile(review.final_path, path)
+                else:
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(review.final_content)
+                logger.info(f"{topic}: {status} in {time.time() - started:.1f}s -> {path}")
+            else:
+                logger.warning(f"{topic}: {status} in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
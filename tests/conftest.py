@@ -0,0 +1,29 @@
+"""
+Shared pytest fixtures
+Every test gets its own in-memory store and output directories, and starts
+with no cassette, LLM cache or budgets configured from the environment
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import cassette, store  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setenv("USAGE_DB_PATH", str(tmp_path / "usage.db"))
+    monkeypatch.setenv("LONGFORM_DIR", str(tmp_path / "longform"))
+    monkeypatch.setenv("SHARED_STORE_URL", "memory://")
+    for name in ("CASSETTE_MODE", "LLM_CACHE_TTL", "SINGLE_FLIGHT_DIR", "DAILY_TOKEN_BUDGET",
+                 "SESSION_TOKEN_BUDGET", "WRITER_VARIANT_MODELS", "PIPELINE_MODE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(store, "_store", None)
+    monkeypatch.setattr(cassette, "_active", None)
+    monkeypatch.setattr(cassette, "_configured", False)
+    return tmp_path
@@ -0,0 +1,32 @@
+"""
+Test doubles for the Groq client
+FakeGroq answers chat.completions.create from a callable and records every call
+"""
+
+import threading
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+
+def completion(content: str, prompt_tokens: int = 10, completion_tokens: int = 20) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, role="assistant"),
+                                 finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                              total_tokens=prompt_tokens + completion_tokens),
+    )
+
+
+class FakeGroq:
+    """Minimal Groq client; ``respond(**kwargs)`` returns content or raises"""
+
+    def __init__(self, respond: Callable[..., str] = None):
+        self.respond = respond or (lambda **kwargs: f"echo: {kwargs['messages'][-1]['content']}")
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        return completion(self.respond(**kwargs))
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from utils.admission import AdmissionCancelled, AdmissionController, AdmissionTimeout
+
+
+def test_admits_up_to_max_active():
+    controller = AdmissionController(max_active=2)
+    with controller.admit("a"), controller.admit("b"):
+        assert controller.stats() == {"active": 2, "queued": 0, "max_active": 2}
+    assert controller.stats()["active"] == 0
+
+
+def _hold_slot(controller):
+    """Hold a slot from another thread until the returned event is set"""
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with controller.admit("holder"):
+            held.set()
+            release.wait(5)
+
+    threading.Thread(target=holder, daemon=True).start()
+    held.wait(5)
+    return release
+
+
+def test_queued_request_times_out_after_max_wait():
+    controller = AdmissionController(max_active=1)
+    release = _hold_slot(controller)
+    started = time.time()
+    with pytest.raises(AdmissionTimeout):
+        with controller.admit("b", poll_interval=0.05, max_wait=0.2):
+            pass
+    assert time.time() - started < 2
+    assert controller.stats()["queued"] == 0
+    release.set()
+
+
+def test_queued_request_can_be_cancelled():
+    controller = AdmissionController(max_active=1)
+    release = _hold_slot(controller)
+    with pytest.raises(AdmissionCancelled):
+        with controller.admit("b", poll_interval=0.05, is_cancelled=lambda: True):
+            pass
+    release.set()
+
+
+def test_sessions_are_admitted_round_robin():
+    controller = AdmissionController(max_active=1)
+    release = _hold_slot(controller)
+    order = []
+
+    def request(session_id):
+        with controller.admit(session_id, poll_interval=0.05):
+            order.append(session_id)
+
+    threads = []
+    for session_id in ("a", "a", "a", "b"):
+        thread = threading.Thread(target=request, args=(session_id,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order[:2] == ["a", "b"]
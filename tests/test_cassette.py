@@ -0,0 +1,38 @@
+import pytest
+
+from tests.fakes import FakeGroq
+from tools.search_backends import FakeBackend
+from tools.search_tool import SearchTool
+from utils import store
+from utils.cassette import CassetteClient, CassetteMiss, use_cassette
+from utils.llm import chat_completion
+
+
+def _ask(client, content="Summarize solar energy"):
+    return chat_completion(client, model="m", messages=[{"role": "user", "content": content}],
+                           max_tokens=50, temperature=0.2, stage="test")
+
+
+def test_record_then_replay_offline(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_TTL", "3600")
+    path = str(tmp_path / "run.jsonl.gz")
+    live = FakeGroq()
+    backend = FakeBackend("live")
+
+    # A warm LLM cache must not hide calls from the recording
+    expected_answer = _ask(live)
+    with use_cassette(path, "record"):
+        assert _ask(live) == expected_answer
+        expected_hits = SearchTool(backends=[backend]).search("solar energy")
+    assert len(live.calls) == 2
+
+    monkeypatch.setattr(store, "_store", None)
+    with use_cassette(path, "replay") as cassette:
+        offline = CassetteClient(None, cassette)
+        assert _ask(offline) == expected_answer
+        assert SearchTool(backends=[FakeBackend("unused", error=RuntimeError("offline"))]) \
+            .search("solar energy") == expected_hits
+        with pytest.raises(CassetteMiss):
+            _ask(offline, "A request that was never recorded")
+    assert len(live.calls) == 2
+    assert backend.calls == ["solar energy"]
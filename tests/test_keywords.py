@@ -0,0 +1,66 @@
+from utils.keywords import KeywordExtractor, format_keywords
+
+
+SOLAR = [
+    "Solar panels convert sunlight into electricity and cut energy bills.",
+    "Residential solar installations cut energy bills for homeowners; solar panels last decades.",
+    "Residential solar installations cut bills and solar panels lower emissions.",
+    "Modern solar panels convert sunlight efficiently, lower energy bills.",
+]
+
+COFFEE = [
+    "Coffee beans are roasted to develop flavor; click here to read more.",
+    "Light roast coffee keeps more acidity than dark roast coffee.",
+    "Grind coffee beans just before brewing for the best flavor.",
+]
+
+
+def test_ranks_recurring_terms_first():
+    keywords = KeywordExtractor().extract(COFFEE)
+    assert keywords[0] in ("coffee", "coffee beans")
+    assert "flavor" in keywords[:5]
+    assert not {"click", "read", "the", "for"} & set(keywords)
+
+
+def test_recurring_phrase_replaces_its_words():
+    keywords = KeywordExtractor().extract(SOLAR)
+    assert keywords[0] == "solar panels"
+    assert "energy bills" in keywords
+    assert not {"solar", "panels", "energy", "bills"} & set(keywords)
+
+
+def test_overlapping_shingles_are_dropped():
+    keywords = KeywordExtractor().extract(SOLAR)
+    assert "residential solar installations" in keywords
+    assert "solar installations cut" not in keywords
+    assert "installations cut bills" not in keywords
+    for phrase in keywords:
+        for other in keywords:
+            if phrase != other:
+                assert f" {phrase} " not in f" {other} "
+
+
+def test_rare_phrase_does_not_replace_a_common_word():
+    snippets = ["Coffee."] * 5 + ["Coffee grinder reviews.", "Coffee grinder prices."]
+    keywords = KeywordExtractor().extract(snippets)
+    assert keywords[0] == "coffee"
+    assert "coffee grinder" not in keywords
+
+
+def test_empty_corpora():
+    extractor = KeywordExtractor()
+    assert extractor.extract_batch([]) == []
+    assert extractor.extract_batch([[], ["", None], ["the and of"]]) == [[], [], []]
+    assert extractor.extract([]) == []
+
+
+def test_batch_matches_single_topic_runs():
+    extractor = KeywordExtractor()
+    # The topics share no vocabulary, so cross-topic IDF scales every score alike
+    batch = extractor.extract_batch([SOLAR, COFFEE], top_k=8)
+    assert batch == [extractor.extract(SOLAR, top_k=8), extractor.extract(COFFEE, top_k=8)]
+    assert extractor.extract_batch([COFFEE, SOLAR], top_k=8) == batch[::-1]
+
+
+def test_format_keywords():
+    assert format_keywords(["a", "b"]) == "## 🔑 Top Keywords\n1. a\n2. b"
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import groq
+import httpx
+import pytest
+
+from tests.fakes import FakeGroq
+from utils.deadline import CancelToken, Cancelled, Deadline, deadline_scope
+from utils.llm import chat_completion
+
+
+def _status_error(cls, status: int, retry_after: str = None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(status, headers=headers, request=httpx.Request("POST", "https://api.groq.test"))
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+def _flaky(*errors):
+    """Raise ``errors`` in turn, then answer"""
+    pending = list(errors)
+
+    def respond(**kwargs):
+        if pending:
+            raise pending.pop(0)
+        return "ok"
+
+    return FakeGroq(respond)
+
+
+def _ask(client):
+    return chat_completion(client, model="m", messages=[{"role": "user", "content": "hi"}],
+                           max_tokens=10, temperature=0.0, stage="test")
+
+
+def test_rate_limit_is_retried_within_the_deadline():
+    client = _flaky(_status_error(groq.RateLimitError, 429, retry_after="0.05"))
+    with deadline_scope(Deadline(5)):
+        assert _ask(client) == "ok"
+    assert len(client.calls) == 2
+
+
+def test_retries_are_skipped_when_the_backoff_does_not_fit():
+    client = _flaky(_status_error(groq.RateLimitError, 429, retry_after="30"))
+    with deadline_scope(Deadline(1)), pytest.raises(groq.RateLimitError):
+        _ask(client)
+    assert len(client.calls) == 1
+
+
+def test_client_errors_are_not_retried():
+    client = _flaky(_status_error(groq.BadRequestError, 400))
+    with pytest.raises(groq.BadRequestError):
+        _ask(client)
+    assert len(client.calls) == 1
+
+
+def test_retries_stop_after_llm_max_retries(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_RETRIES", "1")
+    client = _flaky(*[_status_error(groq.InternalServerError, 503, retry_after="0.01")] * 3)
+    with pytest.raises(groq.InternalServerError):
+        _ask(client)
+    assert len(client.calls) == 2
+
+
+def test_cancel_during_backoff_stops_at_once():
+    token = CancelToken()
+    client = _flaky(_status_error(groq.RateLimitError, 429, retry_after="20"))
+    threading.Timer(0.1, token.cancel).start()
+    started = time.time()
+    with deadline_scope(Deadline(60, token=token)), pytest.raises(Cancelled):
+        _ask(client)
+    assert time.time() - started < 2
@@ -0,0 +1,56 @@
+import os
+import time
+
+from utils.longform import (
+    RollingSummary, draft_paths, expire_articles, iter_sections, parse_outline, split_summary,
+)
+
+
+def test_parse_outline():
+    title, sections = parse_outline(
+        "# Solar Guide\n## Intro :: why solar :: solar, energy\n## Costs :: prices\nnoise\n## **Outro**"
+    )
+    assert title == "Solar Guide"
+    assert [s["heading"] for s in sections] == ["Intro", "Costs", "Outro"]
+    assert sections[0]["keywords"] == ["solar", "energy"]
+    assert sections[1]["keywords"] == []
+
+
+def test_split_summary_falls_back_to_first_sentence():
+    assert split_summary("Body text.\nSUMMARY: It said things.") == ("Body text.", "It said things.")
+    assert split_summary("### Sub\nFirst one. Second one.") == ("### Sub\nFirst one. Second one.", "First one.")
+
+
+def test_rolling_summary_drops_oldest():
+    summary = RollingSummary(max_chars=40)
+    for i in range(5):
+        summary.add(f"Section {i}", "digest")
+    text = summary.text()
+    assert "Section 4" in text and "Section 0" not in text
+    assert text.startswith(f"(… {summary.dropped} earlier sections)")
+
+
+def test_iter_sections_round_trips(tmp_path):
+    path = tmp_path / "a.md"
+    content = "# Title\n\n## One\n\nfirst\n\n## Two\n\nsecond\n"
+    path.write_text(content, encoding="utf-8")
+    chunks = list(iter_sections(str(path)))
+    assert len(chunks) == 3 and "".join(chunks) == content
+
+
+def test_old_articles_expire(tmp_path, monkeypatch):
+    directory = tmp_path / "longform"
+    monkeypatch.setenv("LONGFORM_DIR", str(directory))
+    monkeypatch.setenv("LONGFORM_TTL", "3600")
+    old_draft, old_final = draft_paths("Old topic")
+    for path in (old_draft, old_final):
+        open(path, "w").close()
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+    keep = directory / "notes.txt"
+    keep.write_text("not an article")
+
+    new_draft, _ = draft_paths("New topic")
+    open(new_draft, "w").close()
+    assert not os.path.exists(old_draft) and not os.path.exists(old_final)
+    assert os.path.exists(new_draft) and keep.exists()
+    assert expire_articles(str(directory), ttl=0) == 0
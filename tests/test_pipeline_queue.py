@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+import pipeline
+from utils.records import DraftResult, ResearchResult, ReviewResult, RunRecord
+from utils.store import MemoryStore, SQLiteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteStore(str(tmp_path / "studio.db"), poll_interval=0.02)
+
+
+def _fake_run(topic, model, on_event=None, plan=None, deadline=None):
+    on_event(pipeline.STAGE_MESSAGES["research"])
+    return RunRecord(
+        topic=topic, model=model, status="success",
+        research=ResearchResult(agent="r", status="success", findings="facts"),
+        writing=DraftResult(agent="w", status="success", draft="# Draft"),
+        review=ReviewResult(agent="v", status="success", final_content="# Final"),
+    )
+
+
+def test_queue_mode_refuses_process_local_store():
+    with pytest.raises(RuntimeError, match="memory://"):
+        pipeline.submit_job("topic", "model", store=MemoryStore())
+
+
+def test_job_round_trip_through_sqlite_store(store, monkeypatch):
+    monkeypatch.setattr(pipeline, "run_pipeline", _fake_run)
+    job_id = pipeline.submit_job("Solar Energy", "m", {"variants": 1}, store=store)
+    # An identical request attaches to the queued run instead of queueing another
+    assert pipeline.submit_job("solar  energy", "m", {"variants": 1}, store=store) == job_id
+
+    job = store.pop(pipeline.JOB_QUEUE, timeout=1)
+    assert job["id"] == job_id
+    pipeline.process_job(job, store)
+
+    events = []
+    run = pipeline.follow_job(job_id, on_event=events.append, store=store, poll_interval=0.01)
+    assert isinstance(run, RunRecord)
+    assert run.review.final_content == "# Final"
+    assert events == [pipeline.STAGE_MESSAGES["research"]]
+    # The run is no longer in flight, so the next request queues a new job
+    assert pipeline.submit_job("Solar Energy", "m", {"variants": 1}, store=store) != job_id
+
+
+def test_heartbeat_keeps_a_running_job_in_flight(store, monkeypatch):
+    monkeypatch.setenv("JOB_HEARTBEAT_TTL", "0.3")
+    job_id = pipeline.submit_job("topic", "m", store=store)
+    job = store.pop(pipeline.JOB_QUEUE, timeout=1)
+    stop = pipeline._start_heartbeat(job, store)
+    try:
+        time.sleep(0.8)
+        assert store.get(job["inflight_key"]) == job_id
+        assert store.get(f"job:{job_id}:heartbeat") is not None
+    finally:
+        stop()
+    assert store.get(f"job:{job_id}:heartbeat") is None
+
+
+def test_dead_worker_releases_its_run(store, monkeypatch):
+    monkeypatch.setenv("JOB_HEARTBEAT_TTL", "0.3")
+    job_id = pipeline.submit_job("topic", "m", store=store)
+    job = store.pop(pipeline.JOB_QUEUE, timeout=1)
+    # What a worker leaves behind when it is killed right after a heartbeat
+    store.set(job["inflight_key"], job_id, ttl=0.3)
+    store.set(f"job:{job_id}:heartbeat", time.time(), ttl=0.3)
+
+    with pytest.raises(TimeoutError, match="stopped responding"):
+        pipeline.follow_job(job_id, store=store, poll_interval=0.05)
+    assert pipeline.submit_job("topic", "m", store=store) != job_id
+
+
+def test_partial_long_form_draft_is_returned_unreviewed(tmp_path, monkeypatch):
+    draft_path = tmp_path / "a.draft.md"
+    draft_path.write_text("# Title\n\n## One\n\nwritten\n\n")
+
+    class Writer:
+        def __init__(self, model=None):
+            pass
+
+        def write(self, **kwargs):
+            return DraftResult(agent="w", status="partial", draft_path=str(draft_path), word_count=1200)
+
+    monkeypatch.setattr(pipeline, "WriterAgent", Writer)
+    research = ResearchResult(agent="r", status="success", findings="facts")
+    run = pipeline.run_pipeline("topic", "m", plan={"target_words": (9000, 10000)}, research=research)
+    assert run.status == "partial" and run.review.status == "partial"
+    assert run.review.final_path == str(draft_path)
+    assert "1,200 words" in run.review.review_report
+    assert pipeline.final_content(run.review).startswith("# Title")
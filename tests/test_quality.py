@@ -0,0 +1,71 @@
+from utils.quality import DraftAnalyzer, DraftSelector, split_sections
+
+
+RESEARCH = (
+    "Solar panels convert sunlight into electricity. Residential solar installations "
+    "cut energy bills. Battery storage keeps solar power available at night."
+)
+
+GROUNDED = """# Solar Panels for Homes
+
+Solar panels convert sunlight into electricity for your home. This guide explains how it works.
+
+## How Solar Panels Work
+
+Residential solar installations cut energy bills. Each panel turns daylight into power.
+Most homes see savings within a few years.
+
+## Storing Solar Power
+
+Battery storage keeps solar power available at night. It also helps during outages.
+
+## Conclusion
+
+Solar panels are a practical way to lower costs and use clean energy.
+"""
+
+THIN = "Some thoughts. Things are good. The end."
+
+
+def test_rank_puts_the_structured_grounded_draft_first():
+    selector = DraftSelector(DraftAnalyzer(min_words=50, max_words=400))
+    ranking = selector.rank([THIN, GROUNDED], ["solar panels", "energy"], RESEARCH)
+    assert [entry["index"] for entry in ranking] == [1, 0]
+    assert ranking[0]["score"] > ranking[1]["score"]
+    assert ranking[0]["grounding"] > 0 and ranking[1]["grounding"] == 0
+    assert "metrics" in ranking[0]["report"]
+
+
+def test_rank_keeps_the_original_order_for_ties():
+    ranking = DraftSelector().rank([GROUNDED, GROUNDED], ["solar panels"], RESEARCH)
+    assert [entry["index"] for entry in ranking] == [0, 1]
+    assert DraftSelector().rank([]) == []
+
+
+def test_analyze_batch_matches_single_drafts():
+    analyzer = DraftAnalyzer(min_words=50, max_words=400)
+    drafts = [GROUNDED, THIN, GROUNDED.replace("# Solar Panels for Homes\n\n", "")]
+    keywords = [[], ["solar panels"], []]
+    batch = analyzer.analyze_batch(drafts, keywords)
+    assert batch == [analyzer.analyze(d, k) for d, k in zip(drafts, keywords)]
+    assert analyzer.analyze_batch([]) == []
+
+    good, thin, untitled = batch
+    assert good["passed"] and good["issues"] == []
+    assert not thin["passed"] and {"word_count", "h1", "h2", "kw_title"} <= {i["check"] for i in thin["issues"]}
+    assert [i["check"] for i in untitled["issues"]] == ["h1"]
+
+
+def test_repeated_sentences_flag_their_section():
+    draft = GROUNDED.replace("It also helps during outages.",
+                             "It also helps during outages. Residential solar installations cut energy bills.")
+    report = DraftAnalyzer(min_words=50, max_words=400).analyze(draft)
+    assert report["flagged_sections"] == [2]
+    assert [(i["check"], i["section"]) for i in report["issues"]] == [("duplicates", 2)]
+
+
+def test_split_sections_round_trips():
+    sections = split_sections(GROUNDED)
+    assert sections[0].startswith("# Solar Panels") and sections[1].startswith("## How")
+    assert "".join(sections) == GROUNDED
+    assert split_sections("") == []
@@ -0,0 +1,47 @@
+from tools.query_planner import QueryPlanner
+from utils.records import SearchHit
+
+
+def _hit(link="", title="", snippet=""):
+    return SearchHit(title=title, link=link, snippet=snippet)
+
+
+def test_duplicate_links_within_a_batch_count_once():
+    planner = QueryPlanner("solar energy")
+    planner.next_query()
+    batch = [_hit("https://a", "Solar panels", "panels convert light")] * 3
+    assert planner.observe(batch) == batch[:1]
+    # One new result out of three, and every bigram is new
+    assert planner.novelty == [0.5 * (1 / 3) + 0.5 * 1.0]
+    assert planner.seen_urls == {"https://a"}
+
+
+def test_results_without_links_are_keyed_by_title_or_snippet():
+    planner = QueryPlanner("solar energy")
+    planner.next_query()
+    first = planner.observe([_hit(title="Solar Basics"), _hit(snippet="Only a snippet here")])
+    assert len(first) == 2
+    second = planner.observe([_hit(title="solar  basics", snippet="different text"), _hit()])
+    assert second == []
+
+
+def test_stops_after_low_novelty_with_good_coverage():
+    planner = QueryPlanner("solar energy", min_novelty=0.3, min_queries=2, thin_coverage=2)
+    batch = [_hit(f"https://{i}", f"title {i}", f"snippet words {i}") for i in range(3)]
+    for _ in range(2):
+        assert planner.next_query()
+        planner.observe(batch)
+    assert planner.novelty[-1] == 0.0
+    assert planner.next_query() is None
+
+
+def test_widens_once_when_coverage_is_thin():
+    planner = QueryPlanner("renewable solar energy storage", min_novelty=0.3, min_queries=2, max_queries=6)
+    batch = [_hit("https://only", "one source", "same words")]
+    planner.next_query()
+    planner.observe(batch)
+    planner.next_query()
+    planner.observe(batch)
+    assert planner.next_query() == "renewable solar"
+    planner.observe(batch)
+    assert planner.next_query() is None
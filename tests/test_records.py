@@ -0,0 +1,80 @@
+import json
+
+import msgpack
+import pytest
+
+from utils import records
+from utils.records import (
+    RECORD_TYPES, DraftResult, ResearchResult, ReviewResult, RunRecord, SearchHit, pack, unpack,
+)
+
+
+def _run() -> RunRecord:
+    return RunRecord(
+        topic="Solar", model="m", status="success",
+        research=ResearchResult(agent="Researcher", status="success", findings="ünïcode findings",
+                                keywords=["solar", "panels"]),
+        writing=DraftResult(agent="Writer", status="success", draft="# Draft",
+                            variants=[{"model": "m", "score": 91.5, "selected": True}]),
+        review=ReviewResult(agent="Reviewer", status="success", review_report="ok", final_content="# Final",
+                            pre_review={"score": 90, "issues": []}),
+    )
+
+
+HITS = [SearchHit(title=f"t{i}", link=f"https://{i}", snippet="s") for i in range(5)]
+
+
+@pytest.fixture(params=["msgpack", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(records, "msgpack", None)
+    return request.param
+
+
+def test_nested_run_record_round_trips(codec):
+    data = pack(_run())
+    assert data[:1] == (b"\x01" if codec == "msgpack" else b"{")
+    assert unpack(data) == _run()
+
+
+def test_search_hits_round_trip_as_one_batch(codec):
+    data = pack(HITS)
+    assert unpack(data) == HITS
+    if codec == "json":
+        assert json.loads(data)["~b"] == RECORD_TYPES.index(SearchHit)
+    assert unpack(pack([])) == []
+    mixed = [HITS[0], {"plain": 1}]
+    assert unpack(pack(mixed)) == mixed
+
+
+def test_msgpack_data_needs_msgpack(monkeypatch):
+    data = pack(HITS)
+    monkeypatch.setattr(records, "msgpack", None)
+    with pytest.raises(RuntimeError):
+        unpack(data)
+
+
+def test_legacy_plain_json_rows():
+    legacy = {"topic": "Solar", "status": "success",
+              "research": {"agent": "Researcher", "status": "success", "findings": "f", "dropped": 1},
+              "review": {"agent": "Reviewer", "status": "success", "final_content": "# Final"}}
+    for data in (json.dumps(legacy), json.dumps(legacy).encode("utf-8")):
+        assert unpack(data) == legacy
+    run = RunRecord.from_dict(unpack(json.dumps(legacy)))
+    assert run.research == ResearchResult(agent="Researcher", status="success", findings="f")
+    assert run.review.final_content == "# Final" and run.writing is None
+
+
+def test_older_positional_rows_decode_with_later_fields_unset():
+    code = RECORD_TYPES.index(DraftResult)
+    row = {"~r": code, "v": ["Writer", "success", "# Draft"]}
+    expected = DraftResult(agent="Writer", status="success", draft="# Draft")
+    assert unpack(json.dumps(row)) == expected
+    assert unpack(b"\x01" + msgpack.packb(row, use_bin_type=True)) == expected
+
+
+def test_to_dict_drops_unset_fields():
+    assert SearchHit(error="No results found").to_dict() == {
+        "title": "", "link": "", "snippet": "", "error": "No results found"}
+    assert _run().to_dict()["research"] == {
+        "agent": "Researcher", "status": "success", "findings": "ünïcode findings", "keywords": ["solar", "panels"]}
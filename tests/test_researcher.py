@@ -0,0 +1,36 @@
+import time
+
+from agents.researcher import ResearcherAgent
+from tests.fakes import FakeGroq
+from tools.search_backends import FakeBackend
+from tools.search_tool import SearchTool
+from utils.deadline import Deadline
+
+
+def _researcher(delay: float = 0.0) -> ResearcherAgent:
+    researcher = ResearcherAgent(model="m")
+    researcher.client = FakeGroq(lambda **kwargs: "## Findings\nSolar is growing.")
+    researcher.search_tool = SearchTool(backends=[FakeBackend(delay=delay)])
+    return researcher
+
+
+def test_batch_research_runs_each_topic_under_a_stage_deadline(monkeypatch):
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "0")
+    deadlines = []
+
+    def stage_deadline():
+        deadlines.append(Deadline(0.05))
+        return deadlines[-1]
+
+    started = time.time()
+    results = _researcher(delay=0.2).research_batch(["solar", "wind"], stage_deadline)
+    assert [r.status for r in results] == ["timeout", "timeout"]
+    assert time.time() - started < 2
+    assert len(deadlines) == 2  # one per topic search; timed-out topics are not analyzed
+
+
+def test_batch_research_without_a_deadline(monkeypatch):
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "0")
+    results = _researcher().research_batch(["solar", "wind"])
+    assert [r.status for r in results] == ["success", "success"]
+    assert all(r.keywords for r in results)
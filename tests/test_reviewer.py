@@ -0,0 +1,82 @@
+from agents.reviewer import ReviewerAgent
+from tests.fakes import FakeGroq
+from utils.quality import split_sections
+
+
+TOPIC = "Solar Panels"
+TARGET = (110, 200)
+
+
+SECTIONS = [
+    "## Costs\n\nA typical home system costs less than it did ten years ago. "
+    "Prices vary with roof size and local labor rates. Many states offer rebates that cut the upfront bill.\n\n",
+    "## Savings\n\nMost owners see lower power bills in the first month. "
+    "Savings grow as utility rates rise over time. Net metering credits any extra power you send back.\n\n",
+    "## Upkeep\n\nPanels need little care beyond an occasional rinse. "
+    "Inverters usually last about twelve years before a swap. Check the mounts after heavy storms.\n\n",
+    "## Choosing\n\nCompare warranties before you sign any contract. "
+    "Ask installers for references from nearby jobs. Pick a firm that handles permits for you.\n\n",
+]
+INTRO = "Solar panels turn sunlight into power for your home. This guide covers the basics.\n\n"
+
+
+def _draft(title: bool = True, repeat_in: int = None) -> str:
+    sections = list(SECTIONS)
+    if repeat_in is not None:
+        # split_sections puts the title and intro first, so section n is SECTIONS[n - 1]
+        sections[repeat_in - 1] += "Solar panels turn sunlight into power for your home.\n\n"
+    return (f"# {TOPIC} for Homes\n\n" if title else "") + INTRO + "".join(sections)
+
+
+def _reviewer(respond=None) -> ReviewerAgent:
+    reviewer = ReviewerAgent(model="m")
+    reviewer.client = FakeGroq(respond)
+    return reviewer
+
+
+def test_passing_draft_skips_the_llm():
+    reviewer = _reviewer()
+    draft = _draft()
+    result = reviewer.review(TOPIC, draft, keywords=["home"], target_words=TARGET)
+    assert reviewer.client.calls == []
+    assert result.status == "success" and result.final_content == draft
+    assert result.pre_review["passed"]
+    assert "LLM review skipped" in result.review_report
+
+
+def test_section_issues_send_only_those_sections():
+    draft = _draft(repeat_in=3)
+    sections = split_sections(draft)
+    reviewer = _reviewer(lambda **kwargs: "### REVIEW REPORT\nRemoved a repeat.\n\n"
+                                          "<<<SECTION 3>>>\n## Savings\n\nFixed savings text.")
+    result = reviewer.review(TOPIC, draft, keywords=["home"], target_words=TARGET)
+
+    assert result.pre_review["flagged_sections"] == [3]
+    assert len(reviewer.client.calls) == 1
+    prompt = reviewer.client.calls[0]["messages"][-1]["content"]
+    assert "<<<SECTION 3>>>" in prompt and sections[3].strip() in prompt
+    assert sections[2].strip() not in prompt and sections[4].strip() not in prompt
+
+    expected = sections[:3] + ["## Savings\n\nFixed savings text.\n\n"] + sections[4:]
+    assert result.final_content == "".join(expected)
+    assert result.review_report == "Removed a repeat."
+
+
+def test_document_issues_fall_back_to_a_full_review():
+    draft = _draft(title=False, repeat_in=3)
+    reviewer = _reviewer(lambda **kwargs: "### REVIEW REPORT\nAdded a title.\n\n### FINAL CONTENT\n# Fixed")
+    result = reviewer.review(TOPIC, draft, keywords=["home"], target_words=TARGET)
+
+    assert any(issue["section"] is None for issue in result.pre_review["issues"])
+    prompt = reviewer.client.calls[0]["messages"][-1]["content"]
+    assert draft in prompt and "<<<SECTION" not in prompt
+    assert (result.final_content, result.review_report) == ("# Fixed", "Added a title.")
+
+
+def test_llm_failure_keeps_the_draft():
+    def fail(**kwargs):
+        raise ValueError("boom")
+
+    draft = _draft(title=False)
+    result = _reviewer(fail).review(TOPIC, draft, target_words=TARGET)
+    assert result.status == "error" and result.final_content == draft
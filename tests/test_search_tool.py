@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from tools.search_backends import CircuitBreaker, FakeBackend
+from tools.search_tool import SearchTool
+from utils.deadline import CancelToken, Deadline, deadline_scope
+
+
+@pytest.fixture(autouse=True)
+def no_search_cache(monkeypatch):
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "0")
+    monkeypatch.setenv("SEARCH_TIMEOUT", "2")
+    monkeypatch.setenv("SEARCH_HEDGE_DELAY", "0.1")
+
+
+def _open_breaker(backend: FakeBackend, reset_timeout: float):
+    backend.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    backend.breaker.record_failure()
+
+
+def test_first_backend_answers():
+    primary, secondary = FakeBackend("primary"), FakeBackend("secondary")
+    results = SearchTool(backends=[primary, secondary]).search("solar")
+    assert results[0].title == "primary result"
+    assert secondary.calls == []
+
+
+def test_slow_backend_is_hedged():
+    slow, fast = FakeBackend("slow", delay=1.0), FakeBackend("fast")
+    started = time.time()
+    results = SearchTool(backends=[slow, fast]).search("solar")
+    assert results[0].title == "fast result"
+    assert time.time() - started < 0.9
+
+
+def test_failing_backend_falls_through_and_opens_its_breaker():
+    broken, healthy = FakeBackend("broken", error=RuntimeError("down")), FakeBackend("healthy")
+    tool = SearchTool(backends=[broken, healthy])
+    for _ in range(3):
+        assert tool.search("solar")[0].title == "healthy result"
+    assert broken.breaker.state == "open"
+    tool.search("solar")
+    assert len(broken.calls) == 3
+    assert tool.health()["broken"]["failures"] == 3
+
+
+def test_all_backends_open_returns_an_error_hit():
+    backend = FakeBackend("only")
+    _open_breaker(backend, reset_timeout=60)
+    results = SearchTool(backends=[backend]).search("solar")
+    assert results[0].error == "Search failed: all search backends are unavailable"
+    assert backend.calls == []
+
+
+def test_unlaunched_half_open_backend_keeps_its_probe():
+    healthy, recovering = FakeBackend("healthy"), FakeBackend("recovering")
+    _open_breaker(recovering, reset_timeout=0)
+    tool = SearchTool(backends=[healthy, recovering])
+    for _ in range(3):
+        tool.search("solar")
+    # The hedge never needed the half-open backend, so its probe slot is still free
+    assert recovering.calls == []
+    assert recovering.breaker.allow()
+
+
+def test_half_open_probe_closes_the_breaker():
+    recovering = FakeBackend("recovering")
+    _open_breaker(recovering, reset_timeout=0)
+    tool = SearchTool(backends=[recovering])
+    assert tool.search("solar")[0].title == "recovering result"
+    assert recovering.breaker.state == "closed"
+
+
+def test_no_results_everywhere():
+    tool = SearchTool(backends=[FakeBackend("a", results=[]), FakeBackend("b", results=[])])
+    assert tool.search("solar")[0].error == "No results found"
+
+
+def test_search_stops_when_the_run_is_cancelled():
+    token = CancelToken()
+    tool = SearchTool(backends=[FakeBackend("slow", delay=1.5)])
+    started = time.time()
+    with deadline_scope(Deadline(10, token=token)):
+        threading.Timer(0.1, token.cancel).start()
+        results = tool.search("solar")
+    assert results[0].error == "Search cancelled"
+    assert time.time() - started < 1.0
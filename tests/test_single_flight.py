@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import FlightAbandoned, SingleFlight, fcntl, make_key
+
+
+def test_make_key_normalizes_topic():
+    assert make_key("write", "  Solar   Energy ", 1) == make_key("write", "solar energy", 1)
+    assert make_key("write", "solar energy", 1) != make_key("write", "solar energy", 2)
+
+
+def test_in_process_result_is_shared():
+    flights = SingleFlight()
+    seen = []
+    result, shared = flights.do("k", lambda publish: publish("step") or 42, on_event=seen.append)
+    assert (result, shared) == (42, False)
+    assert seen == ["step"]
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-process coalescing needs POSIX locks")
+def test_follower_restarts_when_a_new_leader_replaces_the_events_file(tmp_path):
+    path = str(tmp_path / "key.events")
+    with open(path, "w") as f:
+        f.write('"old 1"\n"old 2"\n')
+    seen = []
+    position = SingleFlight._tail_events(path, (None, 0), seen.append)
+    assert seen == ["old 1", "old 2"]
+
+    # A new leader swaps in a fresh, shorter file
+    with open(path + ".tmp", "w") as f:
+        f.write('"new 1"\n')
+    os.replace(path + ".tmp", path)
+    SingleFlight._tail_events(path, position, seen.append)
+    assert seen == ["old 1", "old 2", "new 1"]
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-process coalescing needs POSIX locks")
+def test_cross_process_leader_writes_result_file(tmp_path):
+    flights = SingleFlight(lock_dir=str(tmp_path))
+    result, shared = flights.do("k", lambda publish: publish("a") or {"x": 1})
+    assert (result, shared) == ({"x": 1}, False)
+    assert os.path.exists(tmp_path / "k.result")
+    with open(tmp_path / "k.events") as f:
+        assert f.read() == '"a"\n'
+
+
+def _call_concurrently(flights, count, fn):
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flights.do("k", fn))
+        except BaseException as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flights, count):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        with flights._lock:
+            flight = flights._flights.get("k")
+        if flight is not None and flight.followers >= count:
+            return
+        time.sleep(0.01)
+    raise AssertionError("followers never attached")
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight(poll_interval=0.05)
+    release = threading.Event()
+    runs = []
+
+    def work(publish):
+        runs.append(1)
+        release.wait(5)
+        return 42
+
+    leader_threads, leader = _call_concurrently(flights, 1, work)
+    while not runs:
+        time.sleep(0.01)
+    threads, outcomes = _call_concurrently(flights, 4, work)
+    _wait_for_followers(flights, 4)
+    release.set()
+    for thread in leader_threads + threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert leader == [(42, False)]
+    assert outcomes == [(42, True)] * 4
+
+
+class _Rerun(BaseException):
+    """Stands in for a UI framework's rerun signal"""
+
+
+def test_leader_abort_is_not_shared_with_followers():
+    flights = SingleFlight(poll_interval=0.05)
+    release = threading.Event()
+    runs = []
+
+    def work(publish):
+        runs.append(1)
+        release.wait(5)
+        raise _Rerun()
+
+    leader_threads, leader = _call_concurrently(flights, 1, work)
+    while not runs:
+        time.sleep(0.01)
+    threads, outcomes = _call_concurrently(flights, 2, work)
+    _wait_for_followers(flights, 2)
+    release.set()
+    for thread in leader_threads + threads:
+        thread.join(5)
+
+    assert isinstance(leader[0], _Rerun)
+    assert all(isinstance(outcome, FlightAbandoned) for outcome in outcomes)
+    # The key is free again, so a follower can take over as leader
+    assert flights.do("k", lambda publish: 7) == (7, False)
+
+
+def test_leader_errors_are_shared():
+    flights = SingleFlight(poll_interval=0.05)
+    release = threading.Event()
+    runs = []
+
+    def work(publish):
+        runs.append(1)
+        release.wait(5)
+        raise ValueError("boom")
+
+    leader_threads, leader = _call_concurrently(flights, 1, work)
+    while not runs:
+        time.sleep(0.01)
+    threads, outcomes = _call_concurrently(flights, 2, work)
+    _wait_for_followers(flights, 2)
+    release.set()
+    for thread in leader_threads + threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert all(isinstance(outcome, ValueError) for outcome in leader + outcomes)
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from utils.store import MemoryStore, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def shared_store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "store.db"))
+
+
+def test_list_expiry_is_renewed_on_append(shared_store):
+    shared_store.append("events", "a", ttl=0.2)
+    shared_store.append("events", "b", ttl=0.2)
+    time.sleep(0.15)
+    shared_store.append("events", "c", ttl=0.2)
+    time.sleep(0.1)  # past the first two appends' own expiry
+    assert shared_store.read_list("events", 2) == ["c"]
+    assert shared_store.read_list("events") == ["a", "b", "c"]
+
+
+def test_list_expires_after_its_last_append(shared_store):
+    shared_store.append("events", "a", ttl=0.05)
+    time.sleep(0.1)
+    assert shared_store.read_list("events") == []
+
+
+def test_memory_store_sweeps_keys_that_are_never_read_again():
+    store = MemoryStore(sweep_interval=0.05)
+    store.set("search:once", [1], ttl=0.01)
+    store.append("job:1:events", "done", ttl=0.01)
+    store.set("kept", 1)
+    time.sleep(0.1)
+    store.set("search:other", [2], ttl=60)
+    assert set(store._kv) == {"kept", "search:other"}
+    assert not store._lists and not store._list_expires
@@ -0,0 +1,66 @@
+import pytest
+
+from utils.usage import BudgetPolicy, UsageLedger, usage_scope
+
+
+@pytest.fixture
+def ledger_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("ESTIMATED_RUN_TOKENS", "1000")
+    monkeypatch.setenv("BUDGET_FALLBACK_MODEL", "")
+    return str(tmp_path / "shared" / "usage.db")
+
+
+def test_usage_recorded_by_a_worker_counts_against_the_ui_budget(ledger_path, monkeypatch):
+    worker_ledger, ui_ledger = UsageLedger(ledger_path), UsageLedger(ledger_path)
+    with usage_scope("browser-1"):
+        worker_ledger.record("write", "m", {"prompt_tokens": 200, "completion_tokens": 600})
+    assert ui_ledger.tokens_used(model="m") == 800
+    assert ui_ledger.tokens_used(session="browser-1") == 800
+
+    monkeypatch.setenv("SESSION_TOKEN_BUDGET", "1500")
+    plan = BudgetPolicy(ui_ledger).preflight("browser-1", "m")
+    assert plan["allowed"] and plan["target_words"] == BudgetPolicy.SHORT_ARTICLE_WORDS
+
+
+def test_refuses_once_the_daily_budget_is_used_up(ledger_path, monkeypatch):
+    ledger = UsageLedger(ledger_path)
+    ledger.record("write", "m", {"total_tokens": 5000}, session="s")
+    monkeypatch.setenv("DAILY_TOKEN_BUDGET", "5000")
+    plan = BudgetPolicy(ledger).preflight("s", "m")
+    assert not plan["allowed"]
+
+
+def test_low_budget_shortens_long_form_proportionally(ledger_path, monkeypatch):
+    ledger = UsageLedger(ledger_path)
+    monkeypatch.setenv("DAILY_TOKEN_BUDGET", "7000")  # 70% of the 10,000-word estimate
+    plan = BudgetPolicy(ledger).preflight("s", "m", target_words=(9000, 10000))
+    assert plan["allowed"] and not plan["skip_review"]
+    assert plan["target_words"] == (6300, 7000)
+    assert plan["degraded"] == ["Shortened to ~7,000 words to stay within today's token budget"]
+
+
+def test_low_budget_shortens_standard_articles_to_the_short_target(ledger_path, monkeypatch):
+    monkeypatch.setenv("DAILY_TOKEN_BUDGET", "700")
+    plan = BudgetPolicy(UsageLedger(ledger_path)).preflight("s", "m")
+    assert plan["target_words"] == BudgetPolicy.SHORT_ARTICLE_WORDS
+
+
+def test_tight_budget_writes_a_single_draft(ledger_path, monkeypatch):
+    monkeypatch.setenv("DAILY_TOKEN_BUDGET", "1200")  # one run fits, three drafts do not
+    plan = BudgetPolicy(UsageLedger(ledger_path)).preflight("s", "m", variants=3)
+    assert plan["allowed"] and plan["variants"] == 1
+    assert plan["target_words"] is None and not plan["skip_review"]
+    assert plan["degraded"] == ["Single draft instead of best-of-N to stay within today's token budget"]
+
+
+def test_fallback_model_keeps_every_draft_on_it(ledger_path, monkeypatch):
+    ledger = UsageLedger(ledger_path)
+    ledger.record("write", "big", {"total_tokens": 5000}, session="s")
+    monkeypatch.setenv("DAILY_TOKEN_BUDGET", "5000")
+    monkeypatch.setenv("BUDGET_FALLBACK_MODEL", "small")
+    policy = BudgetPolicy(ledger)
+
+    plan = policy.preflight("s", "big", variants=3)
+    assert plan["model"] == "small" and plan["variants"] == 3
+    assert plan["variant_models"] == ["small"]
+    assert policy.preflight("s", "small", variants=3)["variant_models"] is None
@@ -0,0 +1,87 @@
+from collections import Counter
+
+from agents.writer import MAX_VARIANTS, WriterAgent
+from tests.fakes import FakeGroq
+from tests.test_quality import GROUNDED, RESEARCH, THIN
+from utils.deadline import DeadlineExceeded
+from utils.longform import iter_sections, read_text
+from utils.quality import DraftSelector
+
+
+def _writer(monkeypatch, models: str = None) -> WriterAgent:
+    if models:
+        monkeypatch.setenv("WRITER_VARIANT_MODELS", models)
+    writer = WriterAgent(model="big")
+    writer.client = FakeGroq(lambda **kwargs: GROUNDED if kwargs["model"] == "big" else THIN)
+    return writer
+
+
+def test_first_variant_always_uses_the_writer_model(monkeypatch):
+    writer = _writer(monkeypatch, "small,big")
+    result = writer.write("Solar panels", RESEARCH, keywords=["solar panels"], variants=3)
+    assert Counter(call["model"] for call in writer.client.calls) == {"big": 2, "small": 1}
+    assert result.status == "success" and result.draft == GROUNDED
+    assert [v["model"] for v in result.variants if v["selected"]] == ["big"]
+
+
+def test_plan_models_replace_the_env_rotation(monkeypatch):
+    writer = _writer(monkeypatch, "small")
+    writer.write("Solar panels", RESEARCH, variants=2, models=["big"])
+    assert [call["model"] for call in writer.client.calls] == ["big", "big"]
+
+
+def test_variants_are_capped(monkeypatch):
+    writer = _writer(monkeypatch)
+    result = writer.write("Solar panels", RESEARCH, variants=10)
+    assert len(writer.client.calls) == len(result.variants) == MAX_VARIANTS
+
+
+OUTLINE = "# Solar Guide\n## Intro :: why :: solar\n## Costs :: prices :: cost\n## Outro :: wrap up :: solar"
+
+
+def _long_writer(fail_at: int = None) -> WriterAgent:
+    """Answers the outline, then each section; raises DeadlineExceeded on call ``fail_at``"""
+    calls = []
+
+    def respond(**kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            return OUTLINE
+        if len(calls) == fail_at:
+            raise DeadlineExceeded("Run deadline exceeded")
+        return f"Section {len(calls) - 1} text here.\n## Stray heading\nMore words.\nSUMMARY: Said things."
+
+    writer = WriterAgent(model="big")
+    writer.client = FakeGroq(respond)
+    return writer
+
+
+def test_long_form_sections_keep_their_own_headings():
+    result = _long_writer().write("Solar", RESEARCH, target_words=(5000, 6000))
+    assert result.status == "success" and result.outline == ["Solar Guide", "Intro", "Costs", "Outro"]
+    chunks = list(iter_sections(result.draft_path))
+    assert [c.splitlines()[0] for c in chunks[1:]] == ["## Intro", "## Costs", "## Outro"]
+    assert "### Stray heading" in chunks[1] and "SUMMARY" not in chunks[1]
+
+
+def test_long_form_timeout_keeps_the_sections_written():
+    result = _long_writer(fail_at=4).write("Solar", RESEARCH, target_words=(5000, 6000))
+    assert result.status == "partial"
+    assert result.outline == ["Solar Guide", "Intro", "Costs"] and result.word_count > 0
+    assert read_text(result.draft_path).count("\n## ") == 2
+
+    nothing = _long_writer(fail_at=2).write("Solar", RESEARCH, target_words=(5000, 6000))
+    assert nothing.status == "timeout"
+
+
+def test_variants_are_ranked_with_the_topic_as_primary_keyword(monkeypatch):
+    seen = []
+    rank = DraftSelector.rank
+
+    def spy(self, drafts, keywords=None, research=""):
+        seen.append(keywords)
+        return rank(self, drafts, keywords, research)
+
+    monkeypatch.setattr(DraftSelector, "rank", spy)
+    _writer(monkeypatch).write("Solar panels", RESEARCH, keywords=["energy", "bills"], variants=2)
+    assert seen == [["Solar panels", "energy", "bills"]]
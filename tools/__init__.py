@@ -1,5 +1,22 @@
 """Tools package for multi-agent system"""
 
 from .search_tool import SearchTool, SEARCH_TOOL_DESCRIPTION
+from .search_backends import (
+    SearchBackend,
+    DDGTextBackend,
+    DDGNewsBackend,
+    LocalCorpusBackend,
+    FakeBackend,
+)
+from .query_planner import QueryPlanner
 
-__all__ = ["SearchTool", "SEARCH_TOOL_DESCRIPTION"]
+__all__ = [
+    "SearchTool",
+    "SEARCH_TOOL_DESCRIPTION",
+    "SearchBackend",
+    "DDGTextBackend",
+    "DDGNewsBackend",
+    "LocalCorpusBackend",
+    "FakeBackend",
+    "QueryPlanner",
+]
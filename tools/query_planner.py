@@ -0,0 +1,121 @@
+"""
+Adaptive query planning for research
+Generates candidate queries locally from the topic, tracks how much new
+information each batch of results adds, and stops searching once it stops adding
+"""
+
+import re
+from datetime import datetime
+from typing import List, Optional, Set
+
+from utils.keywords import STOPWORDS
+from utils.records import SearchHit
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+
+class QueryPlanner:
+    """
+    Plans search queries for one topic
+
+    Each observed batch is scored for novelty: the share of its results and word
+    bigrams not seen before. Results are identified by URL, or by their title
+    (or snippet) when they have no link. Planning stops once a batch's novelty
+    falls below ``min_novelty`` (after ``min_queries``), unless coverage is still
+    thin (few unique results), in which case broader fallback queries get one try.
+    """
+
+    def __init__(self, topic: str, min_novelty: float = 0.3, min_queries: int = 2,
+                 max_queries: int = 4, thin_coverage: int = 6, year: int = None):
+        self.topic = topic.strip()
+        self.min_novelty = min_novelty
+        self.min_queries = min_queries
+        self.max_queries = max_queries
+        self.thin_coverage = thin_coverage
+        self.year = year or datetime.now().year
+
+        self.issued: List[str] = []
+        self.novelty: List[float] = []
+        self.seen_urls: Set[str] = set()
+        self.seen_ngrams: Set[tuple] = set()
+        self._queue = self._candidate_queries()
+        self._widened = False
+
+    def _candidate_queries(self) -> List[str]:
+        topic = self.topic
+        return [
+            topic,
+            f"{topic} latest trends {self.year}",
+            f"{topic} statistics facts benefits",
+            f"{topic} challenges risks",
+            f"{topic} examples case studies",
+            f"{topic} best practices guide",
+        ]
+
+    def _broader_queries(self) -> List[str]:
+        """Fallbacks that drop qualifiers from narrow or long topics"""
+        core = [w for w in _TOKEN_RE.findall(self.topic.lower()) if w not in STOPWORDS]
+        queries = []
+        if len(core) > 2:
+            queries.append(" ".join(core[:2]))
+        if core:
+            queries.append(f"what is {' '.join(core)}")
+            queries.append(f"{' '.join(core)} overview")
+        return [q for q in queries if q not in self.issued]
+
+    def next_query(self) -> Optional[str]:
+        """The next query to issue, or None when research should stop"""
+        if len(self.issued) >= self.max_queries:
+            return None
+
+        if len(self.novelty) >= self.min_queries and self.novelty[-1] < self.min_novelty:
+            # Diminishing returns: widen once if coverage is still thin, otherwise stop
+            if len(self.seen_urls) >= self.thin_coverage or self._widened:
+                return None
+            self._widened = True
+            self._queue = self._broader_queries() + self._queue
+
+        while self._queue:
+            query = self._queue.pop(0)
+            if query not in self.issued:
+                self.issued.append(query)
+                return query
+        return None
+
+    @staticmethod
+    def _result_key(result: SearchHit) -> str:
+        """Identity of a result: its URL, else its normalized title or snippet"""
+        link = result.link.strip()
+        if link:
+            return link
+        text = result.title.strip() or result.snippet.strip()
+        return f"text:{' '.join(text.lower().split())}" if text else ""
+
+    def observe(self, results: List[SearchHit]) -> List[SearchHit]:
+        """
+        Record a batch of results for the last issued query
+
+        Duplicates within the batch count once, so they cannot inflate novelty.
+
+        Returns:
+            The results not seen before, first occurrence only
+        """
+        new_results = []
+        new_keys: Set[str] = set()
+        batch_ngrams: Set[tuple] = set()
+        for r in results:
+            key = self._result_key(r)
+            if key and key not in self.seen_urls and key not in new_keys:
+                new_keys.add(key)
+                new_results.append(r)
+            tokens = _TOKEN_RE.findall(f"{r.title} {r.snippet}".lower())
+            batch_ngrams.update(zip(tokens, tokens[1:]))
+
+        url_novelty = len(new_results) / len(results) if results else 0.0
+        ngram_novelty = len(batch_ngrams - self.seen_ngrams) / len(batch_ngrams) if batch_ngrams else 0.0
+        self.novelty.append(0.5 * url_novelty + 0.5 * ngram_novelty)
+
+        self.seen_urls |= new_keys
+        self.seen_ngrams |= batch_ngrams
+        return new_results
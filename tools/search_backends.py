@@ -0,0 +1,271 @@
+"""
+Search backends with health tracking and circuit breaking
+DuckDuckGo text, DuckDuckGo news, an offline JSONL corpus, and a fake backend for tests.
+SearchTool hedges across these (see tools/search_tool.py)
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from duckduckgo_search import DDGS
+
+
+class CircuitBreaker:
+    """
+    Stops sending traffic to a failing backend
+
+    Opens after ``failure_threshold`` consecutive failures, lets a single probe
+    through after ``reset_timeout`` seconds (half-open), and closes again when
+    the probe succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.time() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def available(self) -> bool:
+        """Whether ``allow`` would let a request through, without claiming the half-open probe"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return time.time() - self._opened_at >= self.reset_timeout and not self._probing
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now
+
+        In the half-open state this claims the single probe, so call it only
+        right before actually sending the request.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.time() - self._opened_at >= self.reset_timeout and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.time()
+            self._probing = False
+
+
+class BackendHealth:
+    """Rolling latency and outcome stats for one backend"""
+
+    def __init__(self, window: int = 50):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            if ok:
+                self.successes += 1
+                self.latencies.append(latency)
+            else:
+                self.failures += 1
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency of recent successes, or None without samples"""
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+            return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def snapshot(self) -> Dict[str, float]:
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "successes": self.successes,
+                "failures": self.failures,
+                "p95_seconds": round(p95, 3) if p95 is not None else None,
+            }
+
+
+class SearchBackend:
+    """
+    Base class for search backends
+
+    ``search`` returns a list of {title, link, snippet} dicts and raises on failure.
+    """
+
+    name = "backend"
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("SEARCH_BREAKER_FAILURES", 3)),
+            reset_timeout=float(os.getenv("SEARCH_BREAKER_RESET", 30)),
+        )
+        self.health = BackendHealth()
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+
+class DDGTextBackend(SearchBackend):
+    """DuckDuckGo web search"""
+
+    name = "ddg_text"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        with DDGS(timeout=int(os.getenv("SEARCH_TIMEOUT", 10))) as ddgs:
+            return [
+                {
+                    "title":   r.get("title", ""),
+                    "link":    r.get("href", ""),
+                    "snippet": r.get("body", "")
+                }
+                for r in ddgs.text(query, max_results=max_results)
+            ]
+
+
+class DDGNewsBackend(SearchBackend):
+    """DuckDuckGo news search"""
+
+    name = "ddg_news"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        with DDGS(timeout=int(os.getenv("SEARCH_TIMEOUT", 10))) as ddgs:
+            return [
+                {
+                    "title":   r.get("title", ""),
+                    "link":    r.get("url", ""),
+                    "snippet": r.get("body", "")
+                }
+                for r in ddgs.news(query, max_results=max_results)
+            ]
+
+
+class LocalCorpusBackend(SearchBackend):
+    """
+    Offline search over a JSONL corpus of {title, link, snippet} records
+
+    Ranks records by how many query terms appear in their title and snippet.
+    """
+
+    name = "local"
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._records: Optional[List[Dict[str, str]]] = None
+        self._tokens: List[set] = []
+        self._load_lock = threading.Lock()
+
+    def _load(self):
+        with self._load_lock:
+            if self._records is not None:
+                return
+            records = []
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+            self._tokens = [
+                set(self._TOKEN_RE.findall(f"{r.get('title', '')} {r.get('snippet', '')}".lower()))
+                for r in records
+            ]
+            self._records = records
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        self._load()
+        terms = set(self._TOKEN_RE.findall(query.lower()))
+        scored = [
+            (len(terms & tokens), i) for i, tokens in enumerate(self._tokens) if terms & tokens
+        ]
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [
+            {
+                "title":   self._records[i].get("title", ""),
+                "link":    self._records[i].get("link", ""),
+                "snippet": self._records[i].get("snippet", "")
+            }
+            for _, i in scored[:max_results]
+        ]
+
+
+class FakeBackend(SearchBackend):
+    """Deterministic backend for tests: fixed results, optional delay or error"""
+
+    def __init__(self, name: str = "fake", results: List[Dict[str, str]] = None,
+                 delay: float = 0.0, error: Exception = None):
+        super().__init__()
+        self.name = name
+        self.results = results if results is not None else [
+            {"title": f"{name} result", "link": f"https://example.com/{name}", "snippet": f"{name} snippet"}
+        ]
+        self.delay = delay
+        self.error = error
+        self.calls: List[str] = []
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        self.calls.append(query)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return list(self.results[:max_results])
+
+
+BACKEND_FACTORIES = {
+    "ddg_text": DDGTextBackend,
+    "ddg_news": DDGNewsBackend,
+}
+
+_default_backends: Optional[List[SearchBackend]] = None
+_default_lock = threading.Lock()
+
+
+def default_backends() -> List[SearchBackend]:
+    """
+    Process-wide backends in priority order, from SEARCH_BACKENDS
+
+    Shared so health stats and circuit breakers persist across SearchTool instances.
+    The local corpus backend is added when LOCAL_CORPUS_PATH is set.
+    """
+    global _default_backends
+    with _default_lock:
+        if _default_backends is None:
+            names = [n.strip() for n in os.getenv("SEARCH_BACKENDS", "ddg_text,ddg_news,local").split(",")]
+            backends = []
+            for name in names:
+                if name == "local":
+                    corpus = os.getenv("LOCAL_CORPUS_PATH")
+                    if corpus and os.path.exists(corpus):
+                        backends.append(LocalCorpusBackend(corpus))
+                elif name in BACKEND_FACTORIES:
+                    backends.append(BACKEND_FACTORIES[name]())
+            _default_backends = backends or [DDGTextBackend()]
+        return _default_backends
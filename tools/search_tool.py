@@ -2,20 +2,36 @@
 Search Tool for Internet Research
 Uses DuckDuckGo Search API (completely FREE - no API key needed)
 Compatible with duckduckgo-search v6+
+Hedges slow requests across backends (see tools/search_backends.py) and stops
+waiting when the current run deadline expires or the run is cancelled
 """
 
-from duckduckgo_search import DDGS
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict
+import hashlib
 import os
+import time
+from tools.search_backends import SearchBackend, default_backends
+from utils.cassette import get_cassette
+from utils.deadline import current_deadline
+from utils.records import SearchHit, to_plain
+from utils.store import get_store
+
+
+# Shared pool so abandoned hedge requests finish in the background without blocking callers
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
 
 
 class SearchTool:
     """Free internet search using DuckDuckGo — no API key required"""
 
-    def __init__(self, max_results: int = 5):
+    def __init__(self, max_results: int = 5, backends: List[SearchBackend] = None):
         self.max_results = int(os.getenv("MAX_SEARCH_RESULTS", max_results))
+        self.backends = backends if backends is not None else default_backends()
+        self.hedge_delay = float(os.getenv("SEARCH_HEDGE_DELAY", 1.5))
+        self.timeout = float(os.getenv("SEARCH_TIMEOUT", 10))
 
-    def search(self, query: str) -> List[Dict[str, str]]:
+    def search(self, query: str) -> List[SearchHit]:
         """
         Search the internet for a given query
 
@@ -23,20 +39,130 @@ class SearchTool:
             query: Search query string
 
         Returns:
-            List of dicts with title, link, snippet
+            List of SearchHit (title, link, snippet); a single hit with ``error`` set on failure
         """
+        cassette = get_cassette()
+        if cassette is None:
+            return self._search_cached(query)
+
+        request = {"query": query, "max_results": self.max_results}
+        if cassette.mode == "replay":
+            entry = cassette.read("search", request)
+            cassette.pause(entry["elapsed"])
+            return [SearchHit.from_dict(r) for r in entry["response"]]
+
+        started = time.time()
+        results = self._search_cached(query)
+        if not current_deadline().cancelled:
+            cassette.write("search", request, to_plain(results), time.time() - started)
+        return results
+
+    def _search_cached(self, query: str) -> List[SearchHit]:
+        """Search through the shared cache"""
+        # Successful results are shared through the store (SEARCH_CACHE_TTL seconds, 0 disables)
+        ttl = float(os.getenv("SEARCH_CACHE_TTL", 900))
+        normalized = " ".join(query.lower().split())
+        cache_key = f"search:{hashlib.sha1(f'{self.max_results}:{normalized}'.encode('utf-8')).hexdigest()}"
+        if ttl > 0:
+            cached = get_store().get(cache_key)
+            if cached:
+                # Entries cached before results were records are plain dicts
+                return [r if isinstance(r, SearchHit) else SearchHit.from_dict(r) for r in cached]
+
+        results = self._search_hedged(query)
+        if ttl > 0 and results[0].error is None:
+            get_store().set(cache_key, results, ttl=ttl)
+        return results
+
+    def health(self) -> Dict[str, Dict]:
+        """Per-backend circuit state and latency/outcome stats"""
+        return {
+            b.name: {"circuit": b.breaker.state, **b.health.snapshot()}
+            for b in self.backends
+        }
+
+    def _call_backend(self, backend: SearchBackend, query: str) -> List[SearchHit]:
+        started = time.time()
         try:
-            results = []
-            with DDGS() as ddgs:
-                for r in ddgs.text(query, max_results=self.max_results):
-                    results.append({
-                        "title":   r.get("title", ""),
-                        "link":    r.get("href", ""),
-                        "snippet": r.get("body", "")
-                    })
-            return results if results else [{"error": "No results found"}]
-        except Exception as e:
-            return [{"error": f"Search failed: {str(e)}"}]
+            results = [SearchHit.from_dict(r) for r in backend.search(query, self.max_results)]
+        except Exception:
+            backend.health.record(time.time() - started, ok=False)
+            backend.breaker.record_failure()
+            raise
+        backend.health.record(time.time() - started, ok=True)
+        backend.breaker.record_success()
+        return results
+
+    def _hedge_delay_for(self, backend: SearchBackend) -> float:
+        """Wait for the backend's p95 latency before hedging to the next one"""
+        p95 = backend.health.p95()
+        return min(max(p95 if p95 is not None else self.hedge_delay, 0.2), self.timeout)
+
+    def _search_hedged(self, query: str) -> List[SearchHit]:
+        """
+        Query backends in priority order, hedging when one is slow
+
+        The next backend is started when the current one fails, returns nothing,
+        or has not answered within its p95 latency. The first non-empty result wins.
+        """
+        # Only peek here: allow() claims a half-open probe, so it runs when a backend is launched
+        candidates = [b for b in self.backends if b.breaker.available()]
+        if not candidates:
+            return [SearchHit(error="Search failed: all search backends are unavailable")]
+
+        run_deadline = current_deadline()
+        timeout = run_deadline.timeout(self.timeout)
+        deadline = time.time() + timeout
+        pending = {}
+        errors = []
+        # Completed by the run's cancel token so a cancelled run stops waiting at once
+        cancelled = Future()
+
+        def launch_next() -> bool:
+            while candidates:
+                backend = candidates.pop(0)
+                if backend.breaker.allow():
+                    pending[_executor.submit(self._call_backend, backend, query)] = backend
+                    return True
+            return False
+
+        launch_next()
+        with run_deadline.token.on_cancel(lambda: cancelled.done() or cancelled.set_result(None)):
+            while pending and not cancelled.done():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                newest = list(pending.values())[-1]
+                hedge_after = self._hedge_delay_for(newest) if candidates else remaining
+                done, _ = wait(list(pending) + [cancelled], timeout=min(hedge_after, remaining),
+                               return_when=FIRST_COMPLETED)
+                done.discard(cancelled)
+
+                if not done:
+                    if not cancelled.done():
+                        launch_next()
+                    continue
+
+                for future in done:
+                    backend = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        errors.append(f"{backend.name}: {e}")
+                        continue
+                    if results:
+                        return results
+                    errors.append(f"{backend.name}: no results")
+                if not pending:
+                    launch_next()
+
+        if cancelled.done():
+            return [SearchHit(error="Search cancelled")]
+        if pending:
+            errors.append(f"timed out after {round(timeout, 1):g}s")
+        if errors and all(e.endswith("no results") for e in errors):
+            return [SearchHit(error="No results found")]
+        return [SearchHit(error=f"Search failed: {'; '.join(errors) or 'no backend answered'}")]
 
 
 # Tool description (kept for compatibility)
@@ -1,4 +1,9 @@
-"""Utilities package for multi-agent system"""
+"""
+Utilities package for multi-agent system
+Settings are read from the environment when used rather than at import, so the
+module-level singletons here (usage ledger, admission controller, single-flight
+coalescer) still pick up values that load_dotenv() sets after they are imported
+"""
 
 from .logger import AgentLogger, agent_logger
 
@@ -0,0 +1,178 @@
+"""
+Process-wide admission control for pipeline work
+Caps concurrently running stages and LLM calls, queues the rest fairly
+(round-robin across sessions) and reports queue position and estimated wait
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class AdmissionCancelled(Exception):
+    """Raised when a queued request is cancelled before it is admitted"""
+
+
+class AdmissionTimeout(AdmissionCancelled):
+    """Raised when a queued request waits longer than its ``max_wait``"""
+
+
+class _Ticket:
+    __slots__ = ("session_id", "enqueued_at")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.enqueued_at = time.time()
+
+
+class AdmissionController:
+    """
+    Fair admission controller shared by all Streamlit sessions
+
+    At most ``max_active`` holders run at once. Waiting requests are grouped
+    per session and admitted round-robin, so one session submitting many runs
+    cannot starve the others. Wait estimates use a moving average of how long
+    admitted work has held its slot.
+    """
+
+    def __init__(self, max_active: int = None, env_var: str = "MAX_ACTIVE_STAGES",
+                 default_max: int = 3, default_hold_seconds: float = 30.0):
+        self._max_active = max_active
+        self.env_var = env_var
+        self.default_max = default_max
+        self.avg_hold_seconds = default_hold_seconds
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queues: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+
+    @property
+    def max_active(self) -> int:
+        return max(1, self._max_active or int(os.getenv(self.env_var, self.default_max)))
+
+    def _dispatch_order(self) -> List[_Ticket]:
+        """Waiting tickets in the order they will be admitted (round-robin by session)"""
+        order = []
+        queues = [list(q) for q in self._queues.values()]
+        for depth in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[depth] for q in queues if depth < len(q))
+        return order
+
+    def _position(self, ticket: _Ticket) -> int:
+        return self._dispatch_order().index(ticket) + 1
+
+    def estimate_wait(self, position: int) -> float:
+        """Seconds until a request at ``position`` in the queue is likely admitted"""
+        return math.ceil(position / self.max_active) * self.avg_hold_seconds
+
+    def _remove(self, ticket: _Ticket):
+        queue = self._queues.get(ticket.session_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.session_id]
+        self._cond.notify_all()
+
+    @contextmanager
+    def admit(
+        self,
+        session_id: str,
+        on_wait: Callable[[int, float], None] = None,
+        is_cancelled: Callable[[], bool] = None,
+        poll_interval: float = 1.0,
+        max_wait: float = None,
+    ):
+        """
+        Hold an admission slot for the duration of the ``with`` block
+
+        Args:
+            session_id: Identifies the requester for fair queuing
+            on_wait: Called with (position, estimated_wait_seconds) while queued,
+                on the caller's thread
+            is_cancelled: Polled while queued; returning True abandons the request
+            poll_interval: Seconds between queue status updates
+            max_wait: Give up after this many seconds in the queue (None = no
+                limit); bounds requests whose cancellation cannot be detected
+
+        Raises:
+            AdmissionCancelled: If ``is_cancelled`` reports cancellation while queued
+            AdmissionTimeout: If the request is still queued after ``max_wait`` seconds
+        """
+        ticket = _Ticket(session_id)
+        with self._cond:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+
+        try:
+            while True:
+                with self._cond:
+                    position = self._position(ticket)
+                    if position == 1 and self._active < self.max_active:
+                        self._remove(ticket)
+                        # The served session goes to the back of the rotation
+                        if session_id in self._queues:
+                            self._queues.move_to_end(session_id)
+                        self._active += 1
+                        break
+                    self._cond.wait(poll_interval)
+                    position = self._position(ticket)
+
+                if is_cancelled and is_cancelled():
+                    raise AdmissionCancelled(f"Queued request for session {session_id} was cancelled")
+                if max_wait is not None and time.time() - ticket.enqueued_at > max_wait:
+                    raise AdmissionTimeout(f"Queued request for session {session_id} waited over {max_wait:g}s")
+                if on_wait:
+                    on_wait(position, self.estimate_wait(position))
+        except BaseException:
+            with self._cond:
+                self._remove(ticket)
+            raise
+
+        started = time.time()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                held = time.time() - started
+                self.avg_hold_seconds = 0.8 * self.avg_hold_seconds + 0.2 * held
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Current active and queued counts"""
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": sum(len(q) for q in self._queues.values()),
+                "max_active": self.max_active,
+            }
+
+
+_llm_slots: Optional[threading.BoundedSemaphore] = None
+_llm_slots_lock = threading.Lock()
+
+
+@contextmanager
+def llm_call_slot(timeout: float = None):
+    """
+    Limit concurrent LLM requests process-wide (MAX_CONCURRENT_LLM_CALLS)
+
+    Raises:
+        TimeoutError: If no slot frees up within ``timeout`` seconds
+    """
+    global _llm_slots
+    with _llm_slots_lock:
+        if _llm_slots is None:
+            _llm_slots = threading.BoundedSemaphore(int(os.getenv("MAX_CONCURRENT_LLM_CALLS", 4)))
+    if not _llm_slots.acquire(timeout=timeout):
+        raise TimeoutError("Timed out waiting for an LLM call slot")
+    try:
+        yield
+    finally:
+        _llm_slots.release()
+
+
+# Global controller shared by all Streamlit sessions in this process
+stage_admission = AdmissionController()
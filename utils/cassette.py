@@ -0,0 +1,212 @@
+"""
+Record/replay of Groq and search interactions
+CASSETTE_MODE=record captures every chat.completions.create call (including
+streamed chunks and timing) and every SearchTool.search result into a gzipped
+JSONL cassette (CASSETTE_PATH); CASSETTE_MODE=replay serves them back offline,
+at recorded speed or faster (CASSETTE_SPEED, 0 = instant)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    raw = json.dumps([kind, request], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    One cassette file in record or replay mode
+
+    Identical requests are replayed in the order they were recorded; once
+    exhausted, the last recording keeps being served.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", speed: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._entries: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict] = {}
+        if mode == "replay":
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def write(self, kind: str, request: Dict[str, Any], response: Any, elapsed: float,
+              chunks: List[List[Any]] = None):
+        entry = {
+            "kind": kind,
+            "key": request_key(kind, request),
+            "request": request,
+            "response": response,
+            "elapsed": round(elapsed, 4),
+        }
+        if chunks is not None:
+            entry["chunks"] = chunks
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            # Each append is its own gzip member; readers see one concatenated stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    def read(self, kind: str, request: Dict[str, Any]) -> Dict:
+        key = request_key(kind, request)
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            entry = self._last.get(key)
+        if entry is None:
+            raise CassetteMiss(f"No recorded {kind} interaction for request {key} in {self.path}")
+        return entry
+
+    def pause(self, seconds: float):
+        """Sleep for a recorded duration scaled by the replay speed"""
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+# ── Groq client wrapper ────────────────────────────────────────
+
+def _llm_request(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: kwargs.get(k) for k in ("model", "messages", "max_tokens", "temperature", "stream")}
+
+
+def _usage_dict(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {
+        name: getattr(usage, name, None)
+        for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+    }
+
+
+def _completion(content: str, usage: Optional[Dict], finish_reason: str = "stop") -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, role="assistant"),
+                                 finish_reason=finish_reason)],
+        usage=SimpleNamespace(**usage) if usage else None,
+        replayed=True,
+    )
+
+
+class _Completions:
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+
+    def create(self, **kwargs):
+        request = _llm_request(kwargs)
+        if self._cassette.mode == "replay":
+            return self._replay(request)
+
+        started = time.time()
+        response = self._client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(request, response, started)
+
+        choice = response.choices[0]
+        self._cassette.write(
+            "llm", request,
+            {"content": choice.message.content, "finish_reason": choice.finish_reason,
+             "usage": _usage_dict(getattr(response, "usage", None))},
+            time.time() - started,
+        )
+        return response
+
+    def _record_stream(self, request: Dict, stream: Iterator, started: float) -> Iterator:
+        chunks = []
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                chunks.append([round(time.time() - started, 4), delta])
+                yield chunk
+        finally:
+            content = "".join(delta or "" for _, delta in chunks)
+            self._cassette.write("llm", request, {"content": content, "usage": None},
+                                 time.time() - started, chunks=chunks)
+
+    def _replay(self, request: Dict):
+        entry = self._cassette.read("llm", request)
+        response = entry["response"]
+        if request.get("stream"):
+            return self._replay_stream(entry)
+        self._cassette.pause(entry["elapsed"])
+        return _completion(response["content"], response.get("usage"), response.get("finish_reason", "stop"))
+
+    def _replay_stream(self, entry: Dict) -> Iterator:
+        previous = 0.0
+        for offset, delta in entry.get("chunks", []):
+            self._cassette.pause(offset - previous)
+            previous = offset
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class CassetteClient:
+    """Drop-in for the Groq client's ``chat.completions.create`` that records or replays"""
+
+    def __init__(self, client, cassette: Cassette):
+        self.inner = client
+        self.chat = SimpleNamespace(completions=_Completions(client, cassette))
+
+
+# ── Process-wide cassette ──────────────────────────────────────
+
+_active: Optional[Cassette] = None
+_configured = False
+_active_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process cassette configured by CASSETTE_MODE/CASSETTE_PATH, or None when off"""
+    global _active, _configured
+    with _active_lock:
+        if not _configured:
+            mode = os.getenv("CASSETTE_MODE", "off").lower()
+            if mode in ("record", "replay"):
+                _active = Cassette(
+                    os.getenv("CASSETTE_PATH", "cassettes/session.jsonl.gz"),
+                    mode,
+                    float(os.getenv("CASSETTE_SPEED", 0)),
+                )
+            _configured = True
+        return _active
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", speed: float = 0.0):
+    """Record or replay everything inside the block (for tests and batch runs)"""
+    global _active, _configured
+    cassette = Cassette(path, mode, speed)
+    with _active_lock:
+        previous = (_active, _configured)
+        _active, _configured = cassette, True
+    try:
+        yield cassette
+    finally:
+        with _active_lock:
+            _active, _configured = previous
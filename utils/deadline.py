@@ -0,0 +1,142 @@
+"""
+Run deadlines and cooperative cancellation
+A run gets one overall Deadline (RUN_DEADLINE seconds) that hands out per-stage
+budgets; a CancelToken lets a newer run abort an older one's in-flight work.
+The active deadline is carried in a context variable so agents and tools can
+bound their own I/O without extra parameters
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+
+class Cancelled(Exception):
+    """Work was cancelled before it finished"""
+
+
+class DeadlineExceeded(Cancelled):
+    """Work ran out of time"""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks to abort blocking I/O"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block for up to ``timeout`` seconds; True if the token was cancelled"""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run ``callback`` if the token is cancelled while the block is executing"""
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+class Deadline:
+    """
+    Absolute deadline plus a cancel token
+
+    ``child`` derives a stage budget that never outlives its parent and shares
+    the parent's token, so cancelling a run cancels all of its stages.
+    """
+
+    def __init__(self, seconds: float = None, token: CancelToken = None, expires_at: float = None):
+        if expires_at is None and seconds is not None:
+            expires_at = time.time() + seconds
+        self.expires_at = expires_at
+        self.token = token or CancelToken()
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def child(self, share: float = 1.0, seconds: float = None) -> "Deadline":
+        """A stage deadline: ``share`` of the remaining time, or ``seconds``, whichever is sooner"""
+        budget = self.remaining() * share
+        if seconds is not None:
+            budget = min(budget, seconds)
+        expires_at = None if budget == float("inf") else time.time() + budget
+        return Deadline(token=self.token, expires_at=expires_at)
+
+    def check(self):
+        """Raise if the work should stop now"""
+        if self.token.cancelled:
+            raise Cancelled("Run was cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Run deadline exceeded")
+
+    def timeout(self, cap: float = None) -> Optional[float]:
+        """Seconds to pass as an I/O timeout, or None when unbounded"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return None if remaining == float("inf") else remaining
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Deadline:
+    """The deadline of the work running on this thread (unbounded if none)"""
+    return _current.get() or Deadline()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """Make ``deadline`` the current deadline inside the block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def cancellation_status(error: BaseException) -> str:
+    """Result status for an exception: "timeout", "cancelled" or "error" """
+    if isinstance(error, DeadlineExceeded):
+        return "timeout"
+    if isinstance(error, Cancelled):
+        return "cancelled"
+    return "error"
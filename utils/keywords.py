@@ -0,0 +1,201 @@
+"""
+Local keyword extraction for research snippets
+RAKE-style candidate phrases scored with a TF-IDF variant, vectorized with NumPy
+Runs in milliseconds and lets the Researcher skip asking the LLM for keywords
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each even every few
+for from further get gets getting had has have having he her here hers herself him himself his
+how however i if in into is it its itself just like may me might more most much must my myself
+new no nor not now of off often on once one only or other our ours ourselves out over own per
+read really said same see she should since so some such than that the their theirs them
+themselves then there these they this those through to too under until up upon us use used
+using very via was we well were what when where whether which while who whom why will with
+within without would yet you your yours yourself yourselves
+click com html http https learn let make makes many more page says site top way ways www
+""".split())
+
+_CHUNK_SPLIT_RE = re.compile(r"[.,;:!?()\[\]{}\"|/\\\n\t•·–—…]+")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#'\-]*[a-z0-9+#]|[a-z]")
+
+
+class KeywordExtractor:
+    """
+    Ranks keyphrases across one or many topics' search snippets
+
+    Candidates are runs of non-stopwords (RAKE), up to ``max_phrase_len`` words.
+    Each snippet is a document; scores combine sublinear term frequency, how many
+    of the topic's snippets mention the phrase, a phrase-length boost and an IDF
+    across topics that suppresses boilerplate shared by unrelated topics.
+    """
+
+    def __init__(self, top_k: int = 15, max_phrase_len: int = 3, min_phrase_df: int = 2):
+        self.top_k = top_k
+        self.max_phrase_len = max_phrase_len
+        self.min_phrase_df = min_phrase_df
+
+    def _candidates(self, text: str) -> List[str]:
+        """Split text into stopword-delimited runs and emit their n-grams"""
+        phrases = []
+        for chunk in _CHUNK_SPLIT_RE.split(text.lower()):
+            run: List[str] = []
+            for word in _WORD_RE.findall(chunk) + [""]:
+                if word and word not in STOPWORDS and not word.isdigit() and len(word) > 1:
+                    run.append(word)
+                    continue
+                for n in range(1, min(self.max_phrase_len, len(run)) + 1):
+                    for i in range(len(run) - n + 1):
+                        phrases.append(" ".join(run[i:i + n]))
+                run = []
+        return phrases
+
+    def extract(self, snippets: Sequence[str], top_k: int = None) -> List[str]:
+        """
+        Extract ranked keywords for a single topic
+
+        Args:
+            snippets: Titles/snippets returned by the search tool
+            top_k: Number of keywords to return (defaults to ``self.top_k``)
+
+        Returns:
+            Keywords ordered from most to least relevant
+        """
+        return self.extract_batch([snippets], top_k)[0]
+
+    def extract_batch(self, corpora: Sequence[Sequence[str]], top_k: int = None) -> List[List[str]]:
+        """
+        Extract ranked keywords for many topics in one vectorized pass
+
+        Args:
+            corpora: One list of snippets per topic
+            top_k: Number of keywords to return per topic
+
+        Returns:
+            One ranked keyword list per topic, in input order
+        """
+        top_k = top_k or self.top_k
+        n_topics = len(corpora)
+        if n_topics == 0:
+            return []
+
+        vocab: Dict[str, int] = {}
+        doc_ids: List[int] = []
+        term_ids: List[int] = []
+        doc_topic: List[int] = []
+        for topic_idx, snippets in enumerate(corpora):
+            for snippet in snippets:
+                doc = len(doc_topic)
+                doc_topic.append(topic_idx)
+                for phrase in self._candidates(snippet or ""):
+                    doc_ids.append(doc)
+                    term_ids.append(vocab.setdefault(phrase, len(vocab)))
+
+        if not vocab:
+            return [[] for _ in range(n_topics)]
+
+        n_terms = len(vocab)
+        terms = np.empty(n_terms, dtype=object)
+        terms[list(vocab.values())] = list(vocab.keys())
+        words_per_term = np.fromiter((t.count(" ") + 1 for t in terms), dtype=np.float64, count=n_terms)
+
+        # (doc, term) occurrence counts as sparse COO
+        pair_keys, pair_counts = np.unique(
+            np.asarray(doc_ids, dtype=np.int64) * n_terms + np.asarray(term_ids, dtype=np.int64),
+            return_counts=True,
+        )
+        pair_doc = pair_keys // n_terms
+        pair_term = pair_keys % n_terms
+        pair_topic = np.asarray(doc_topic, dtype=np.int64)[pair_doc]
+
+        # Aggregate to (topic, term): summed sublinear tf and snippet document frequency
+        topic_keys, inverse = np.unique(pair_topic * n_terms + pair_term, return_inverse=True)
+        topic_tf = np.bincount(inverse, weights=np.log1p(pair_counts))
+        topic_df = np.bincount(inverse).astype(np.float64)
+        key_topic = topic_keys // n_terms
+        key_term = topic_keys % n_terms
+
+        docs_per_topic = np.bincount(np.asarray(doc_topic, dtype=np.int64), minlength=n_topics)
+        topics_per_term = np.bincount(key_term, minlength=n_terms)
+        idf = np.log((1.0 + n_topics) / (1.0 + topics_per_term)) + 1.0
+
+        spread = topic_df / np.maximum(docs_per_topic[key_topic], 1)
+        length_boost = 1.0 + 0.5 * (words_per_term[key_term] - 1.0)
+        scores = topic_tf * idf[key_term] * (1.0 + spread) * length_boost
+
+        # Multi-word phrases must recur across snippets, unless the topic has too few
+        single_word = words_per_term[key_term] == 1
+        min_df = np.minimum(self.min_phrase_df, docs_per_topic[key_topic])
+        scores[~single_word & (topic_df < min_df)] = 0.0
+
+        order = np.lexsort((-scores, key_topic))
+        ordered_topic = key_topic[order]
+        bounds = np.searchsorted(ordered_topic, np.arange(n_topics + 1))
+
+        results = []
+        for topic_idx in range(n_topics):
+            ranked = []
+            for idx in order[bounds[topic_idx]:bounds[topic_idx + 1]]:
+                if scores[idx] <= 0:
+                    break
+                ranked.append((terms[key_term[idx]], int(topic_df[idx])))
+            results.append(self._select(ranked, top_k))
+        return results
+
+    @staticmethod
+    def _select(ranked: Sequence[tuple], top_k: int) -> List[str]:
+        """
+        Pick up to ``top_k`` non-redundant phrases from (phrase, snippet count) pairs, best first
+
+        A phrase that contains already-picked single words takes the place of the
+        first of them when it appears in at least half as many snippets ("solar
+        panels" over "solar"); otherwise, or when it extends an already-picked
+        phrase, it is dropped. Phrases that only overlap at their ends ("residential solar installations" / "solar installations cut")
+        are shingles of the same text and are dropped too.
+        """
+        picked: List[tuple] = []
+        df: Dict[tuple, int] = {}
+        for phrase, count in ranked:
+            if len(picked) >= top_k:
+                break
+            words = tuple(phrase.split())
+            inside = [p for p in picked if _contains(words, p)]
+            if any(_contains(p, words) or (p not in inside and _shingled(p, words)) for p in picked):
+                continue
+            if inside:
+                if any(len(p) > 1 or 2 * count < df[p] for p in inside):
+                    continue
+                picked[picked.index(inside[0])] = words
+                picked = [p for p in picked if p not in inside[1:]]
+            else:
+                picked.append(words)
+            df[words] = count
+        return [" ".join(p) for p in picked]
+
+
+def _contains(outer: tuple, inner: tuple) -> bool:
+    """Whether ``inner`` occurs as a contiguous run of words in ``outer``"""
+    return any(outer[i:i + len(inner)] == inner for i in range(len(outer) - len(inner) + 1))
+
+
+def _shingled(a: tuple, b: tuple) -> bool:
+    """Whether the end of one phrase is the start of the other"""
+    return any(a[-k:] == b[:k] or b[-k:] == a[:k] for k in range(1, min(len(a), len(b))))
+
+
+def format_keywords(keywords: Sequence[str]) -> str:
+    """Render keywords as the Markdown section the Researcher used to ask the LLM for"""
+    lines = ["## 🔑 Top Keywords"]
+    lines.extend(f"{i}. {kw}" for i, kw in enumerate(keywords, 1))
+    return "\n".join(lines)
+
+
+# Global extractor instance
+keyword_extractor = KeywordExtractor()
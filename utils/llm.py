@@ -0,0 +1,158 @@
+"""
+Shared LLM call path for all agents
+Applies the process-wide LLM concurrency limit, the optional shared
+response cache (LLM_CACHE_TTL seconds, 0 disables), token usage recording,
+cassette record/replay (CASSETTE_MODE) and the current run deadline, which
+also bounds retries of rate-limited or failed requests (LLM_MAX_RETRIES)
+"""
+
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+from groq import APIConnectionError, APIStatusError, Groq
+
+from utils.admission import llm_call_slot
+from utils.cassette import CassetteClient, get_cassette
+from utils.deadline import Cancelled, Deadline, DeadlineExceeded, current_deadline
+from utils.logger import agent_logger
+from utils.store import get_store
+from utils.usage import usage_ledger
+
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def create_client():
+    """Groq client for an agent; no API key is needed when replaying a cassette"""
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return CassetteClient(None, cassette)
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying ``error``, or None if it is not retryable
+
+    Mirrors the Groq SDK's own policy: connection errors, timeouts, 408/409/429
+    and 5xx are retried with jittered exponential backoff, honouring a
+    reasonable Retry-After header.
+    """
+    if isinstance(error, APIStatusError):
+        if error.status_code not in RETRYABLE_STATUS and error.status_code < 500:
+            return None
+        try:
+            retry_after = float(error.response.headers.get("retry-after", ""))
+        except (TypeError, ValueError):
+            retry_after = None
+        if retry_after is not None and 0 < retry_after <= 60:
+            return retry_after
+    elif not isinstance(error, APIConnectionError):
+        return None
+    return min(0.5 * 2 ** attempt, 8.0) * (1 - 0.25 * random.random())
+
+
+def _create_with_retries(raw_client, cassette, deadline: Deadline, stage: str, request: Dict):
+    """
+    Send one completion request, retrying transient errors within the deadline
+
+    The SDK's built-in retries are turned off because each would restart the
+    full timeout; instead every attempt is bounded by the time left, and a
+    retry only happens if its backoff still fits before the deadline.
+    """
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", 2))
+    attempt = 0
+    while True:
+        deadline.check()
+        attempt_client = raw_client
+        if hasattr(raw_client, "with_options"):
+            timeout = deadline.timeout()
+            options = {"max_retries": 0}
+            if timeout is not None:
+                options["timeout"] = max(timeout, 0.1)
+            attempt_client = raw_client.with_options(**options)
+        client = CassetteClient(attempt_client, cassette) if cassette is not None else attempt_client
+
+        def abort():
+            # Runs on the thread that cancels the token (e.g. a newer run); closing the
+            # HTTP client makes the request blocked in create() below fail at once
+            close = getattr(getattr(client, "inner", client), "close", None)
+            if close:
+                close()
+
+        try:
+            with llm_call_slot(timeout=deadline.timeout()), deadline.token.on_cancel(abort):
+                return client.chat.completions.create(**request)
+        except Exception as e:
+            if deadline.cancelled:
+                raise Cancelled(f"{stage} call cancelled") from e
+            if deadline.expired():
+                raise DeadlineExceeded(f"{stage} call ran out of time") from e
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries or delay >= deadline.remaining():
+                raise
+            attempt += 1
+            agent_logger.log_tool_use(
+                "LLM Retry", f"{stage}: {type(e).__name__}, attempt {attempt + 1} in {delay:.1f}s"
+            )
+            # Back off outside the LLM slot, waking early if the run is cancelled
+            if deadline.token.wait(delay):
+                raise Cancelled(f"{stage} call cancelled") from e
+
+
+def chat_completion(client, model: str, messages: List[Dict[str, str]],
+                    max_tokens: int, temperature: float, stage: str = "llm") -> str:
+    """
+    Run a chat completion and return the message content
+
+    Args:
+        client: Groq client
+        model: Model name
+        messages: Chat messages
+        max_tokens: Completion token limit
+        temperature: Sampling temperature
+        stage: Pipeline stage the usage is attributed to
+
+    Returns:
+        The assistant message content
+
+    Raises:
+        DeadlineExceeded: If the current deadline expires before the call completes
+        Cancelled: If the current run is cancelled; the in-flight request is aborted
+        groq.APIError: If the request fails and retries (LLM_MAX_RETRIES) are
+            exhausted or would not fit before the deadline
+    """
+    cassette = get_cassette()
+    # Cache hits would never reach the cassette, so recording and replaying bypass the cache
+    ttl = float(os.getenv("LLM_CACHE_TTL", 0)) if cassette is None else 0
+    cache_key = None
+    if ttl > 0:
+        raw = json.dumps([model, messages, max_tokens, temperature], sort_keys=True)
+        cache_key = f"llm:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+        cached = get_store().get(cache_key)
+        if cached is not None:
+            agent_logger.log_tool_use("LLM Cache", f"hit for {model}")
+            return cached
+
+    deadline = current_deadline()
+    deadline.check()
+    response = _create_with_retries(getattr(client, "inner", client), cassette, deadline, stage, dict(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature
+    ))
+
+    if not getattr(response, "replayed", False):
+        try:
+            usage_ledger.record(stage, model, getattr(response, "usage", None))
+        except Exception as e:
+            agent_logger.log_tool_use("Usage Ledger", f"failed to record usage: {e}")
+
+    content = response.choices[0].message.content
+    if cache_key:
+        get_store().set(cache_key, content, ttl=ttl)
+    return content
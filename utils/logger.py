@@ -7,6 +7,7 @@ import sys
 from loguru import logger
 from datetime import datetime
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 
 class AgentLogger:
@@ -21,41 +22,33 @@ class AgentLogger:
             level="INFO"
         )
     
-    def log_agent_start(self, agent_name: str, task: str):
-        """Log when an agent starts working"""
-        logger.info(f"🤖 {agent_name} started: {task}")
+    def _append_session_log(self, agent_name: str, message: str, log_type: str):
+        """Record a log entry for the UI; no-op outside a Streamlit script thread (e.g. workers)"""
+        if get_script_run_ctx() is None:
+            return
         if 'logs' not in st.session_state:
             st.session_state.logs = []
         st.session_state.logs.append({
             "time": datetime.now().strftime("%H:%M:%S"),
             "agent": agent_name,
-            "message": f"Started: {task}",
-            "type": "start"
+            "message": message,
+            "type": log_type
         })
     
+    def log_agent_start(self, agent_name: str, task: str):
+        """Log when an agent starts working"""
+        logger.info(f"🤖 {agent_name} started: {task}")
+        self._append_session_log(agent_name, f"Started: {task}", "start")
+    
     def log_agent_complete(self, agent_name: str, result_preview: str = ""):
         """Log when an agent completes its task"""
         logger.success(f"✅ {agent_name} completed")
-        if 'logs' not in st.session_state:
-            st.session_state.logs = []
-        st.session_state.logs.append({
-            "time": datetime.now().strftime("%H:%M:%S"),
-            "agent": agent_name,
-            "message": f"Completed: {result_preview[:50]}...",
-            "type": "complete"
-        })
+        self._append_session_log(agent_name, f"Completed: {result_preview[:50]}...", "complete")
     
     def log_agent_error(self, agent_name: str, error: str):
         """Log when an agent encounters an error"""
         logger.error(f"❌ {agent_name} error: {error}")
-        if 'logs' not in st.session_state:
-            st.session_state.logs = []
-        st.session_state.logs.append({
-            "time": datetime.now().strftime("%H:%M:%S"),
-            "agent": agent_name,
-            "message": f"Error: {error}",
-            "type": "error"
-        })
+        self._append_session_log(agent_name, f"Error: {error}", "error")
     
     def log_tool_use(self, tool_name: str, query: str):
         """Log when a tool is used"""
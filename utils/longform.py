@@ -0,0 +1,191 @@
+"""
+Long-form generation helpers (5k-20k word articles)
+A long article is written section by section against an outline and a rolling
+summary of what came before, and every section is appended to disk as soon as
+it exists, so memory and per-call prompt size stay flat however long the
+article gets
+"""
+
+import math
+import os
+import re
+import time
+import uuid
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_OUTLINE_LINE_RE = re.compile(r"^\s*##\s+(.+?)\s*$")
+_SUMMARY_RE = re.compile(r"(?mi)^\s*SUMMARY:\s*(.+?)\s*$")
+_FIRST_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]")
+_BODY_HEADING_RE = re.compile(r"(?m)^#{1,2}(?=[ \t])")
+
+
+def longform_threshold() -> int:
+    """Articles longer than this many words use long-form mode (LONGFORM_THRESHOLD)"""
+    return int(os.getenv("LONGFORM_THRESHOLD", 2000))
+
+
+def section_words() -> int:
+    """Target words per long-form section (LONGFORM_SECTION_WORDS)"""
+    return int(os.getenv("LONGFORM_SECTION_WORDS", 700))
+
+
+def is_long_form(target_words: Optional[Tuple[int, int]]) -> bool:
+    return bool(target_words) and target_words[1] > longform_threshold()
+
+
+def section_count(target_words: Tuple[int, int]) -> int:
+    """Number of H2 sections needed to reach the middle of the target range"""
+    return max(3, math.ceil((target_words[0] + target_words[1]) / 2 / section_words()))
+
+
+def draft_paths(topic: str) -> Tuple[str, str]:
+    """Fresh (draft, final) file paths under LONGFORM_DIR for one run; also expires old articles"""
+    directory = os.getenv("LONGFORM_DIR", "output/longform")
+    os.makedirs(directory, exist_ok=True)
+    expire_articles(directory)
+    slug = re.sub(r"[^\w\-]+", "_", topic).strip("_")[:60] or "article"
+    stem = f"{slug}-{uuid.uuid4().hex[:8]}"
+    return os.path.join(directory, f"{stem}.draft.md"), os.path.join(directory, f"{stem}.md")
+
+
+def expire_articles(directory: str, ttl: float = None) -> int:
+    """
+    Delete long-form drafts and articles not modified for LONGFORM_TTL seconds
+
+    Files still being written are appended to continuously, so only finished
+    runs age out. A TTL of 0 keeps everything.
+
+    Returns:
+        Number of files deleted
+    """
+    ttl = float(os.getenv("LONGFORM_TTL", 86400)) if ttl is None else ttl
+    if ttl <= 0:
+        return 0
+    cutoff = time.time() - ttl
+    deleted = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.name.endswith(".md") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                deleted += 1
+        except OSError:
+            pass  # Removed by another process, or unreadable: leave it
+    return deleted
+
+
+def parse_outline(text: str) -> Tuple[str, List[Dict[str, object]]]:
+    """
+    Parse an outline of ``# Title`` and ``## Heading :: brief :: kw1, kw2`` lines
+
+    Returns:
+        The title (may be empty) and one dict per section with heading, brief
+        and keywords
+    """
+    title = ""
+    sections = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("# ") and not title:
+            title = stripped[2:].strip()
+            continue
+        match = _OUTLINE_LINE_RE.match(stripped)
+        if not match:
+            continue
+        parts = [p.strip() for p in match.group(1).split("::")]
+        heading = parts[0].strip("*").strip()
+        if not heading:
+            continue
+        sections.append({
+            "heading": heading,
+            "brief": parts[1] if len(parts) > 1 else "",
+            "keywords": [k.strip() for k in parts[2].split(",") if k.strip()] if len(parts) > 2 else [],
+        })
+    return title, sections
+
+
+def split_summary(text: str) -> Tuple[str, str]:
+    """
+    Separate a generated section from its trailing ``SUMMARY:`` line
+
+    Falls back to the section's first sentence when the model left the summary out.
+    """
+    matches = list(_SUMMARY_RE.finditer(text))
+    if matches:
+        last = matches[-1]
+        body = (text[:last.start()] + text[last.end():]).strip()
+        return body, last.group(1)
+    body = text.strip()
+    prose = "\n".join(line for line in body.splitlines() if not line.lstrip().startswith("#"))
+    first = _FIRST_SENTENCE_RE.search(prose)
+    return body, first.group(0).strip() if first else ""
+
+
+def strip_heading(body: str, heading: str) -> str:
+    """Drop a leading heading the model repeated; the caller writes its own"""
+    lines = body.lstrip().splitlines()
+    if lines and lines[0].lstrip().startswith("#") and heading.lower() in lines[0].lower():
+        return "\n".join(lines[1:]).strip()
+    return body.strip()
+
+
+def demote_headings(body: str) -> str:
+    """Turn H1/H2 lines in a section body into H3, so only the article's own H2s start sections"""
+    return _BODY_HEADING_RE.sub("###", body)
+
+
+class RollingSummary:
+    """
+    Most recent section digests that fit in ``max_chars``
+
+    Older digests fall off the front; the outline still tells the model which
+    sections exist, so this only has to carry what was actually said recently.
+    """
+
+    def __init__(self, max_chars: int = None):
+        self.max_chars = max_chars or int(os.getenv("LONGFORM_SUMMARY_CHARS", 1500))
+        self._entries: deque = deque()
+        self._chars = 0
+        self.dropped = 0
+
+    def add(self, heading: str, digest: str):
+        entry = f"- {heading}: {digest}" if digest else f"- {heading}"
+        self._entries.append(entry)
+        self._chars += len(entry) + 1
+        while self._chars > self.max_chars and len(self._entries) > 1:
+            self._chars -= len(self._entries.popleft()) + 1
+            self.dropped += 1
+
+    def text(self) -> str:
+        if not self._entries:
+            return "(This is the first section.)"
+        lead = f"(… {self.dropped} earlier sections)\n" if self.dropped else ""
+        return lead + "\n".join(self._entries)
+
+
+def iter_sections(path: str) -> Iterator[str]:
+    """
+    Stream a Markdown file one H2 section at a time
+
+    Text before the first H2 (the title) is yielded as its own chunk, and
+    ``"".join`` of the chunks restores the file, like ``split_sections``.
+    """
+    chunk: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("## ") and chunk:
+                yield "".join(chunk)
+                chunk = []
+            chunk.append(line)
+    if chunk:
+        yield "".join(chunk)
+
+
+def read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,353 @@
+"""
+Deterministic local pre-review for content drafts
+Scores heading hierarchy, keyword placement/density, readability, duplicated
+sentences and word count in milliseconds, so the Reviewer can skip the LLM
+round-trip for good drafts or send it only the sections that need work
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils.keywords import STOPWORDS
+
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_SECTION_SPLIT_RE = re.compile(r"(?m)^(?=##\s)")
+_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]?")
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9'\-]*")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+_MARKDOWN_RE = re.compile(r"[*_`>#\[\]()|]")
+
+# Feature columns used by the vectorized scorer
+FEATURES = (
+    "words", "h1_count", "h2_count", "heading_skips",
+    "kw_in_title", "kw_in_intro", "kw_density", "kw_coverage",
+    "flesch", "duplicates",
+)
+
+# Points deducted per failed check
+PENALTIES = {
+    "word_count": 15,
+    "h1": 20,
+    "h2": 10,
+    "heading_skips": 10,
+    "kw_title": 10,
+    "kw_intro": 5,
+    "kw_density": 10,
+    "kw_coverage": 5,
+    "readability": 10,
+    "duplicates": 15,
+}
+
+
+def split_sections(draft: str) -> List[str]:
+    """Split a Markdown draft at its H2 headings; ``"".join`` restores the draft"""
+    return [s for s in _SECTION_SPLIT_RE.split(draft) if s]
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(_MARKDOWN_RE.sub(" ", text))
+
+
+def _sentences(text: str) -> List[str]:
+    body = "\n".join(line for line in text.splitlines() if not line.lstrip().startswith("#"))
+    return [s.strip() for s in _SENTENCE_RE.findall(_MARKDOWN_RE.sub(" ", body)) if len(s.split()) >= 3]
+
+
+def _flesch(text: str) -> float:
+    """Flesch reading ease with a vowel-group syllable estimate"""
+    words = _words(text)
+    sentences = _sentences(text)
+    if not words or not sentences:
+        return 100.0
+    syllables = sum(max(1, len(_VOWEL_GROUP_RE.findall(w.lower()))) for w in words)
+    return 206.835 - 1.015 * (len(words) / len(sentences)) - 84.6 * (syllables / len(words))
+
+
+def _content_tokens(phrase: str) -> List[str]:
+    return [w for w in (t.lower() for t in _words(phrase)) if w not in STOPWORDS]
+
+
+def _match_ratio(tokens: Sequence[str], text: str) -> float:
+    if not tokens:
+        return 1.0
+    present = set(w.lower() for w in _words(text))
+    return sum(t in present for t in tokens) / len(tokens)
+
+
+class DraftAnalyzer:
+    """
+    Mechanical quality gate run before the LLM review
+
+    ``analyze_batch`` extracts one feature row per draft and scores all rows
+    with vectorized threshold checks; section-level issues (readability and
+    duplicated sentences) carry the index of the offending H2 section.
+    """
+
+    def __init__(
+        self,
+        min_words: int = 800,
+        max_words: int = 1000,
+        word_tolerance: float = 0.15,
+        min_flesch: float = 30.0,
+        density_range: tuple = (0.005, 0.08),
+        min_coverage: float = 0.4,
+        pass_score: int = 90,
+    ):
+        self.min_words = min_words
+        self.max_words = max_words
+        self.word_tolerance = word_tolerance
+        self.min_flesch = min_flesch
+        self.density_range = density_range
+        self.min_coverage = min_coverage
+        self.pass_score = pass_score
+
+    def _extract(self, draft: str, keywords: Sequence[str]) -> tuple:
+        """Return the feature row and section-level issues for one draft"""
+        headings = [(len(m.group(1)), m.group(2)) for m in _HEADING_RE.finditer(draft)]
+        levels = [lvl for lvl, _ in headings]
+        skips = sum(1 for prev, cur in zip(levels, levels[1:]) if cur > prev + 1)
+        title = next((text for lvl, text in headings if lvl == 1), "")
+
+        sections = split_sections(draft)
+        paragraphs = [
+            p for p in re.split(r"\n\s*\n", draft)
+            if p.strip() and not p.lstrip().startswith("#")
+        ]
+        intro = paragraphs[0] if paragraphs else ""
+
+        words = [w.lower() for w in _words(draft)]
+        primary = _content_tokens(keywords[0]) if keywords else []
+        primary_hits = sum(1 for w in words if w in set(primary))
+        secondary = [kw for kw in keywords[1:] if kw]
+        lowered = draft.lower()
+        coverage = (
+            sum(1 for kw in secondary if kw.lower() in lowered) / len(secondary)
+            if secondary else 1.0
+        )
+
+        section_issues: List[Dict] = []
+        seen = set()
+        duplicates = 0
+        for idx, section in enumerate(sections):
+            for sentence in _sentences(section):
+                norm = " ".join(sentence.lower().split())
+                if norm in seen:
+                    duplicates += 1
+                    section_issues.append({
+                        "check": "duplicates",
+                        "section": idx,
+                        "message": f"Repeated sentence: \"{sentence[:80]}\"",
+                    })
+                seen.add(norm)
+            if len(_words(section)) >= 40:
+                score = _flesch(section)
+                if score < self.min_flesch:
+                    section_issues.append({
+                        "check": "readability",
+                        "section": idx,
+                        "message": f"Hard to read (Flesch {score:.0f}); shorten sentences and simplify wording",
+                    })
+
+        row = (
+            len(words),
+            levels.count(1),
+            levels.count(2),
+            skips,
+            _match_ratio(primary, title) >= 0.6,
+            _match_ratio(primary, intro) >= 0.6,
+            primary_hits / len(words) if words else 0.0,
+            coverage,
+            _flesch(draft),
+            duplicates,
+        )
+        return row, section_issues
+
+    def analyze_batch(self, drafts: Sequence[str], keywords: Sequence[Sequence[str]] = None) -> List[Dict]:
+        """
+        Score many drafts at once
+
+        Args:
+            drafts: Markdown drafts to check
+            keywords: Per-draft keyword lists; the first entry is the primary keyword
+
+        Returns:
+            One report dict per draft with score, passed, issues and flagged_sections
+        """
+        if not drafts:
+            return []
+        keywords = keywords or [[] for _ in drafts]
+        extracted = [self._extract(d, k or []) for d, k in zip(drafts, keywords)]
+        X = np.array([row for row, _ in extracted], dtype=np.float64).reshape(len(drafts), len(FEATURES))
+        col = {name: X[:, i] for i, name in enumerate(FEATURES)}
+
+        low = self.min_words * (1 - self.word_tolerance)
+        high = self.max_words * (1 + self.word_tolerance)
+        has_keywords = np.array([bool(k) for k in keywords])
+        failed = {
+            "word_count": (col["words"] < low) | (col["words"] > high),
+            "h1": col["h1_count"] != 1,
+            "h2": col["h2_count"] < 2,
+            "heading_skips": col["heading_skips"] > 0,
+            "kw_title": has_keywords & (col["kw_in_title"] == 0),
+            "kw_intro": has_keywords & (col["kw_in_intro"] == 0),
+            "kw_density": has_keywords & (
+                (col["kw_density"] < self.density_range[0]) | (col["kw_density"] > self.density_range[1])
+            ),
+            "kw_coverage": col["kw_coverage"] < self.min_coverage,
+            "readability": col["flesch"] < self.min_flesch,
+            "duplicates": col["duplicates"] > 0,
+        }
+        names = list(PENALTIES)
+        F = np.stack([failed[name] for name in names], axis=1)
+        weights = np.array([PENALTIES[name] for name in names], dtype=np.float64)
+        scores = np.clip(100.0 - F @ weights, 0, 100)
+
+        reports = []
+        for i, (_, section_issues) in enumerate(extracted):
+            metrics = {name: float(col[name][i]) for name in FEATURES}
+            issues = [
+                {"check": name, "section": None, "message": self._describe(name, metrics)}
+                for j, name in enumerate(names)
+                if F[i, j] and name not in ("duplicates", "readability")
+            ]
+            issues.extend(section_issues)
+            if F[i, names.index("readability")] and not any(x["check"] == "readability" for x in section_issues):
+                issues.append({"check": "readability", "section": None,
+                               "message": self._describe("readability", metrics)})
+            reports.append({
+                "score": int(scores[i]),
+                "passed": bool(scores[i] >= self.pass_score),
+                "issues": issues,
+                "flagged_sections": sorted({x["section"] for x in issues if x["section"] is not None}),
+                "metrics": metrics,
+            })
+        return reports
+
+    def analyze(self, draft: str, keywords: Sequence[str] = None) -> Dict:
+        """Score a single draft; see ``analyze_batch``"""
+        return self.analyze_batch([draft], [list(keywords or [])])[0]
+
+    def analyze_section(self, section: str, seen: set = None) -> List[Dict]:
+        """
+        Checks that make sense for one section of a long-form article on its own
+
+        Word count is checked against this analyzer's min/max words. Sentences
+        are also compared with those of earlier sections recorded in ``seen``,
+        which is updated in place.
+
+        Returns:
+            Issue dicts (check, section=None, message); empty when the section is fine
+        """
+        seen = seen if seen is not None else set()
+        issues: List[Dict] = []
+        count = len(_words(section))
+        if count < self.min_words * (1 - self.word_tolerance) or count > self.max_words * (1 + self.word_tolerance):
+            issues.append({"check": "word_count", "section": None,
+                           "message": self._describe("word_count", {"words": count})})
+
+        levels = [len(m.group(1)) for m in _HEADING_RE.finditer(section)]
+        if any(cur > prev + 1 for prev, cur in zip(levels, levels[1:])):
+            issues.append({"check": "heading_skips", "section": None,
+                           "message": self._describe("heading_skips", {})})
+
+        for sentence in _sentences(section):
+            norm = " ".join(sentence.lower().split())
+            if norm in seen:
+                issues.append({"check": "duplicates", "section": None,
+                               "message": f"Repeated sentence: \"{sentence[:80]}\""})
+            seen.add(norm)
+
+        if count >= 40:
+            flesch = _flesch(section)
+            if flesch < self.min_flesch:
+                issues.append({"check": "readability", "section": None,
+                               "message": f"Hard to read (Flesch {flesch:.0f}); shorten sentences and simplify wording"})
+        return issues
+
+    def _describe(self, check: str, m: Dict[str, float]) -> str:
+        if check == "word_count":
+            return f"Word count {m['words']:.0f} is outside the {self.min_words}-{self.max_words} target"
+        if check == "h1":
+            return f"Expected exactly one H1 title, found {m['h1_count']:.0f}"
+        if check == "h2":
+            return f"Only {m['h2_count']:.0f} H2 sections; structure the article into at least two"
+        if check == "heading_skips":
+            return "Heading levels are skipped (e.g. H1 followed directly by H3)"
+        if check == "kw_title":
+            return "Primary keyword is missing from the H1 title"
+        if check == "kw_intro":
+            return "Primary keyword is missing from the introduction"
+        if check == "kw_density":
+            return f"Primary keyword density {m['kw_density']:.1%} is outside " \
+                   f"{self.density_range[0]:.1%}-{self.density_range[1]:.1%}"
+        if check == "kw_coverage":
+            return f"Only {m['kw_coverage']:.0%} of the research keywords are used"
+        if check == "readability":
+            return f"Overall readability is low (Flesch {m['flesch']:.0f})"
+        return check
+
+
+def _content_bigrams(text: str) -> set:
+    tokens = [w for w in (t.lower() for t in _words(text)) if w not in STOPWORDS and not w.isdigit()]
+    return set(zip(tokens, tokens[1:]))
+
+
+class DraftSelector:
+    """
+    Local best-of-N selection between alternative drafts of one article
+
+    Each draft's rank score mixes the DraftAnalyzer score (structure, length,
+    keyword placement) with keyword coverage, readability and grounding: the
+    share of content-word bigrams from the research that the draft reuses.
+    """
+
+    def __init__(self, analyzer: DraftAnalyzer = None, weights: Dict[str, float] = None):
+        self.analyzer = analyzer or DraftAnalyzer()
+        self.weights = weights or {"quality": 0.6, "coverage": 15.0, "readability": 10.0, "grounding": 15.0}
+
+    def rank(self, drafts: Sequence[str], keywords: Sequence[str] = None, research: str = "") -> List[Dict]:
+        """
+        Score drafts and order them best first
+
+        Args:
+            drafts: Alternative Markdown drafts
+            keywords: Research keywords; the first entry is the primary keyword
+            research: Research findings the drafts were written from
+
+        Returns:
+            One dict per draft (index, score, report, grounding), best first
+        """
+        if not drafts:
+            return []
+        keywords = list(keywords or [])
+        reports = self.analyzer.analyze_batch(drafts, [keywords] * len(drafts))
+        facts = _content_bigrams(research)
+        grounding = np.array([
+            len(_content_bigrams(d) & facts) / len(facts) if facts else 0.0 for d in drafts
+        ])
+        quality = np.array([r["score"] for r in reports], dtype=np.float64)
+        coverage = np.array([r["metrics"]["kw_coverage"] for r in reports])
+        readability = np.clip([r["metrics"]["flesch"] for r in reports], 0, 80) / 80
+        w = self.weights
+        scores = (w["quality"] * quality + w["coverage"] * coverage
+                  + w["readability"] * readability + w["grounding"] * np.minimum(grounding * 2, 1.0))
+
+        order = np.argsort(-scores, kind="stable")
+        return [
+            {"index": int(i), "score": round(float(scores[i]), 1), "report": reports[i],
+             "grounding": round(float(grounding[i]), 3)}
+            for i in order
+        ]
+
+
+def format_issues(issues: Sequence[Dict]) -> str:
+    """Render pre-review issues as a Markdown bullet list"""
+    lines = []
+    for issue in issues:
+        where = f" (section {issue['section']})" if issue.get("section") is not None else ""
+        lines.append(f"- {issue['message']}{where}")
+    return "\n".join(lines)
+
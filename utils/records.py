@@ -0,0 +1,182 @@
+"""
+Typed results passed between agents, workers, caches and queues
+Slotted dataclasses for search hits, stage results and run records;
+``pack``/``unpack`` give them a compact binary form: msgpack when installed,
+JSON otherwise
+"""
+
+import json
+import operator
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON fallback below
+    msgpack = None
+
+
+class Record:
+    """Base of the result dataclasses: conversion to and from plain dicts"""
+
+    __slots__ = ()
+    _field_cache: Dict[type, Tuple[str, ...]] = {}
+
+    @classmethod
+    def field_names(cls) -> Tuple[str, ...]:
+        names = Record._field_cache.get(cls)
+        if names is None:
+            names = Record._field_cache[cls] = tuple(f.name for f in fields(cls))
+        return names
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the fields that are set (not None), nested records included"""
+        values = ((name, getattr(self, name)) for name in self.field_names())
+        return {name: to_plain(value) for name, value in values if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build from a dict, ignoring unknown keys"""
+        names = cls.field_names()
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+@dataclass(slots=True)
+class SearchHit(Record):
+    """One search result, or an error in place of results"""
+    title: str = ""
+    link: str = ""
+    snippet: str = ""
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ResearchResult(Record):
+    agent: str
+    status: str
+    findings: str = ""
+    keywords: Optional[List[str]] = None
+    raw_search_data: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DraftResult(Record):
+    """
+    Writer output; long-form drafts live in ``draft_path`` instead of ``draft``
+
+    ``variants`` scores every best-of-N draft. New fields go at the end: packed
+    records are positional, and older rows decode with the new fields unset.
+    """
+    agent: str
+    status: str
+    draft: Optional[str] = None
+    draft_path: Optional[str] = None
+    outline: Optional[List[str]] = None
+    word_count: Optional[int] = None
+    variants: Optional[List[Dict[str, Any]]] = None
+
+
+@dataclass(slots=True)
+class ReviewResult(Record):
+    """Reviewer output; long-form articles live in ``final_path`` instead of ``final_content``"""
+    agent: str
+    status: str
+    review_report: str = ""
+    final_content: Optional[str] = None
+    final_path: Optional[str] = None
+    pre_review: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class RunRecord(Record):
+    """One pipeline run: the stage results reached and the overall status"""
+    topic: str = ""
+    model: str = ""
+    status: Optional[str] = None
+    research: Optional[ResearchResult] = None
+    writing: Optional[DraftResult] = None
+    review: Optional[ReviewResult] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunRecord":
+        record = super(RunRecord, cls).from_dict(data)
+        for name, stage_cls in (("research", ResearchResult), ("writing", DraftResult), ("review", ReviewResult)):
+            value = getattr(record, name)
+            if isinstance(value, dict):
+                setattr(record, name, stage_cls.from_dict(value))
+        return record
+
+
+# Wire codes; append only, never renumber (packed data outlives deployments)
+RECORD_TYPES = (SearchHit, ResearchResult, DraftResult, ReviewResult, RunRecord)
+_CODES = {cls: code for code, cls in enumerate(RECORD_TYPES)}
+_VALUES = {cls: operator.attrgetter(*cls.field_names()) for cls in RECORD_TYPES}
+_TAG = "~r"
+_BATCH_TAG = "~b"
+_MSGPACK_MAGIC = b"\x01"
+
+
+def to_plain(value: Any) -> Any:
+    """Replace records with plain dicts, e.g. for human-readable JSON"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    return value
+
+
+def _encode(value: Any) -> Any:
+    # Records travel as positional field arrays, so field names are not repeated per record
+    if isinstance(value, Record):
+        return {_TAG: _CODES[type(value)], "v": _VALUES[type(value)](value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _batch(value: Any) -> Any:
+    """Encode a list of same-type records (e.g. search hits) as one tagged table of rows"""
+    if isinstance(value, list) and value and isinstance(value[0], Record):
+        cls = type(value[0])
+        if all(type(item) is cls for item in value):
+            values = _VALUES[cls]
+            return {_BATCH_TAG: _CODES[cls], "v": [values(item) for item in value]}
+    return value
+
+
+def _decode(obj: Dict) -> Any:
+    if len(obj) == 2:
+        if _TAG in obj:
+            return RECORD_TYPES[obj[_TAG]](*obj["v"])
+        if _BATCH_TAG in obj:
+            cls = RECORD_TYPES[obj[_BATCH_TAG]]
+            return [cls(*row) for row in obj["v"]]
+    return obj
+
+
+def pack(value: Any) -> bytes:
+    """
+    Serialize plain values and records
+
+    With msgpack, strings are written as length-prefixed UTF-8 with no escaping,
+    so decoding skips JSON's parsing and unescaping (each string is still copied
+    into a new ``str``). Records are written as positional field arrays, and a
+    top-level list of same-type records (search hits) as one table of rows.
+    """
+    value = _batch(value)
+    if msgpack is not None:
+        return _MSGPACK_MAGIC + msgpack.packb(value, default=_encode, use_bin_type=True)
+    return json.dumps(value, default=_encode, separators=(",", ":")).encode("utf-8")
+
+
+def unpack(data) -> Any:
+    """Inverse of ``pack``; also reads plain JSON written before records existed"""
+    if isinstance(data, str):
+        return json.loads(data, object_hook=_decode)
+    view = memoryview(data)
+    if view[:1] == _MSGPACK_MAGIC:
+        if msgpack is None:
+            raise RuntimeError("Data was packed with msgpack, which is not installed: pip install msgpack")
+        return msgpack.unpackb(view[1:], object_hook=_decode, raw=False, strict_map_key=False)
+    return json.loads(bytes(view), object_hook=_decode)
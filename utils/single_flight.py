@@ -0,0 +1,232 @@
+"""
+Single-flight request coalescing for pipeline stages
+Concurrent calls with the same key share one execution and its progress events.
+In-process by default; set SINGLE_FLIGHT_DIR to also coalesce across processes
+via lock files (POSIX only)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process coalescing only
+    fcntl = None
+
+from utils.records import pack, unpack
+
+
+class FlightAbandoned(Exception):
+    """Raised in followers when the leader stopped without a result (e.g. its script was rerun)"""
+
+
+def make_key(stage: str, topic: str, *parts: Any) -> str:
+    """Build a coalescing key from normalized inputs"""
+    normalized_topic = " ".join(topic.lower().split())
+    raw = json.dumps([stage, normalized_topic, *parts], sort_keys=True, default=str)
+    return f"{stage}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+class Flight:
+    """One in-flight execution shared by a leader and any number of followers"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.events: List[str] = []
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+    def publish(self, event: str):
+        with self.cond:
+            self.events.append(event)
+            self.cond.notify_all()
+
+    def finish(self, result: Any = None, error: BaseException = None):
+        with self.cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.cond.notify_all()
+
+    def follow(self, on_event: Callable[[str], None] = None, poll: float = 0.5) -> Any:
+        """
+        Block until the flight finishes, replaying its events on the caller's thread
+
+        Events are delivered from the follower's own thread so callers can safely
+        update per-session UI elements from ``on_event``.
+        """
+        seen = 0
+        while True:
+            with self.cond:
+                if len(self.events) == seen and not self.done:
+                    self.cond.wait(poll)
+                new_events = self.events[seen:]
+                seen += len(new_events)
+                done = self.done
+            if on_event:
+                for event in new_events:
+                    on_event(event)
+            if done and seen == len(self.events):
+                break
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Coalesces duplicate concurrent calls
+
+    The first caller for a key runs ``fn(publish)``; callers arriving while it
+    runs attach to it and receive the same result and every event passed to
+    ``publish``. Results are not cached once the flight completes.
+
+    Only ordinary exceptions are shared with followers. Anything else that
+    stops the leader (KeyboardInterrupt, a UI framework's rerun or stop
+    signal) belongs to the leader alone: followers get ``FlightAbandoned``
+    and may retry as leader.
+    """
+
+    def __init__(self, lock_dir: str = None, poll_interval: float = 0.5):
+        self._lock_dir = lock_dir
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Flight] = {}
+
+    @property
+    def lock_dir(self) -> Optional[str]:
+        lock_dir = self._lock_dir or os.getenv("SINGLE_FLIGHT_DIR") or None
+        return lock_dir if fcntl is not None else None
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[Callable[[str], None]], Any],
+        on_event: Callable[[str], None] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once per key across concurrent callers
+
+        Args:
+            key: Coalescing key, usually from ``make_key``
+            fn: Work to run; receives a ``publish(event)`` callable for progress
+            on_event: Called with each progress event on the caller's thread
+
+        Returns:
+            Tuple of (result, shared) where shared is True if another caller ran it
+
+        Raises:
+            FlightAbandoned: If we followed a leader that stopped without a result
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = Flight()
+                self._flights[key] = flight
+            else:
+                flight.followers += 1
+
+        if not leader:
+            return flight.follow(on_event, self.poll_interval), True
+
+        def publish(event: str):
+            flight.publish(event)
+            if on_event:
+                on_event(event)
+
+        try:
+            if self.lock_dir:
+                result, shared = self._do_cross_process(key, fn, publish)
+            else:
+                result, shared = fn(publish), False
+            flight.finish(result=result)
+            return result, shared
+        except Exception as e:
+            flight.finish(error=e)
+            raise
+        except BaseException as e:
+            flight.finish(error=FlightAbandoned(f"Leader for {key} stopped: {type(e).__name__}"))
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _do_cross_process(self, key: str, fn: Callable, publish: Callable[[str], None]) -> Tuple[Any, bool]:
+        """Coalesce with other processes through an flock'd file per key"""
+        os.makedirs(self.lock_dir, exist_ok=True)
+        base = os.path.join(self.lock_dir, key)
+        started = time.time()
+
+        with open(f"{base}.lock", "a+") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process leads: tail its events until it releases the lock
+                position = (None, 0)
+                while True:
+                    position = self._tail_events(f"{base}.events", position, publish)
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        time.sleep(self.poll_interval)
+                self._tail_events(f"{base}.events", position, publish)
+                try:
+                    if os.path.getmtime(f"{base}.result") >= started:
+                        with open(f"{base}.result", "rb") as f:
+                            return unpack(f.read()), True
+                except (OSError, ValueError):
+                    pass  # Leader failed without a result: run it ourselves
+
+            try:
+                # Each leader swaps in a fresh events file; followers notice the new inode and restart from 0
+                events_tmp = f"{base}.events.{os.getpid()}.tmp"
+                open(events_tmp, "w").close()
+                os.replace(events_tmp, f"{base}.events")
+                with open(f"{base}.events", "a", encoding="utf-8") as events_file:
+                    def publish_shared(event: str):
+                        events_file.write(json.dumps(event) + "\n")
+                        events_file.flush()
+                        publish(event)
+
+                    result = fn(publish_shared)
+
+                tmp_path = f"{base}.result.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(pack(result))
+                os.replace(tmp_path, f"{base}.result")
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _tail_events(path: str, position: Tuple[Optional[int], int],
+                     publish: Callable[[str], None]) -> Tuple[Optional[int], int]:
+        """Publish complete event lines past ``position`` (inode, offset); returns the new position"""
+        inode, offset = position
+        try:
+            with open(path, "rb") as f:
+                current = os.fstat(f.fileno()).st_ino
+                if current != inode:
+                    # A new leader took over the key: its events start at the top of a new file
+                    inode, offset = current, 0
+                f.seek(offset)
+                for line in iter(f.readline, b""):
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    publish(json.loads(line))
+        except OSError:
+            pass
+        return inode, offset
+
+
+# Global coalescer shared by all Streamlit sessions in this process
+pipeline_flights = SingleFlight()
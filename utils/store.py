@@ -0,0 +1,330 @@
+"""
+Shared key-value / queue backend for caches, jobs and results
+Pluggable via SHARED_STORE_URL:
+  memory://                 process-local (default, single container)
+  sqlite:///data/studio.db  shared by processes on one host or volume
+  redis://redis:6379/0      shared by UI and worker replicas (needs `redis`)
+Values are JSON-style data and/or result records (utils/records.py); the shared
+backends store them packed (msgpack when installed, JSON otherwise)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional
+
+from utils.records import pack, unpack
+
+
+class SharedStore:
+    """Interface implemented by every backend"""
+
+    # False for backends other processes cannot see (queue mode needs a shared one)
+    shared = True
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        raise NotImplementedError
+
+    def set_if_absent(self, key: str, value: Any, ttl: float = None) -> bool:
+        """Atomically set ``key`` unless it exists; returns True if it was set"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def append(self, key: str, value: Any, ttl: float = None):
+        """Append to the list stored at ``key``"""
+        raise NotImplementedError
+
+    def read_list(self, key: str, start: int = 0) -> List[Any]:
+        """Items of the list at ``key`` from index ``start`` onwards"""
+        raise NotImplementedError
+
+    def push(self, queue: str, value: Any):
+        """Enqueue ``value`` at the tail of ``queue``"""
+        raise NotImplementedError
+
+    def pop(self, queue: str, timeout: float = 5.0) -> Optional[Any]:
+        """Dequeue from the head of ``queue``, waiting up to ``timeout`` seconds"""
+        raise NotImplementedError
+
+
+class MemoryStore(SharedStore):
+    """
+    Process-local store; the default when nothing is shared
+
+    Expired entries are dropped when read and swept from the whole store at
+    most every ``sweep_interval`` seconds, so keys that are never read again
+    (one-off search queries, finished jobs) do not accumulate.
+    """
+
+    shared = False
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._cond = threading.Condition()
+        self._kv: Dict[str, tuple] = {}
+        self._lists: Dict[str, List[Any]] = defaultdict(list)
+        self._list_expires: Dict[str, float] = {}
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._next_sweep = time.time() + sweep_interval
+
+    def _sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for key in [k for k, (_, expires) in self._kv.items() if expires is not None and expires < now]:
+            del self._kv[key]
+        for key in [k for k, expires in self._list_expires.items() if expires < now]:
+            self._lists.pop(key, None)
+            del self._list_expires[key]
+
+    def _live(self, key: str) -> Optional[tuple]:
+        entry = self._kv.get(key)
+        if entry and entry[1] is not None and entry[1] < time.time():
+            del self._kv[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._cond:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        with self._cond:
+            self._sweep()
+            self._kv[key] = (value, time.time() + ttl if ttl else None)
+
+    def set_if_absent(self, key: str, value: Any, ttl: float = None) -> bool:
+        with self._cond:
+            self._sweep()
+            if self._live(key):
+                return False
+            self._kv[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str):
+        with self._cond:
+            self._kv.pop(key, None)
+            self._lists.pop(key, None)
+            self._list_expires.pop(key, None)
+
+    def append(self, key: str, value: Any, ttl: float = None):
+        with self._cond:
+            self._sweep()
+            self._lists[key].append(value)
+            # Like Redis EXPIRE: the whole list lives ``ttl`` past its latest append
+            if ttl:
+                self._list_expires[key] = time.time() + ttl
+
+    def read_list(self, key: str, start: int = 0) -> List[Any]:
+        with self._cond:
+            expires = self._list_expires.get(key)
+            if expires is not None and expires < time.time():
+                self._lists.pop(key, None)
+                del self._list_expires[key]
+            return list(self._lists.get(key, [])[start:])
+
+    def push(self, queue: str, value: Any):
+        with self._cond:
+            self._queues[queue].append(value)
+            self._cond.notify_all()
+
+    def pop(self, queue: str, timeout: float = 5.0) -> Optional[Any]:
+        deadline = time.time() + timeout
+        with self._cond:
+            while not self._queues[queue]:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._queues[queue].popleft()
+
+
+class SQLiteStore(SharedStore):
+    """SQLite-backed store; a Redis stand-in for one host or a shared volume"""
+
+    def __init__(self, path: str, poll_interval: float = 0.2):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, expires REAL);
+                CREATE TABLE IF NOT EXISTS lists (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                                  key TEXT, value TEXT, expires REAL);
+                CREATE INDEX IF NOT EXISTS lists_key ON lists (key, id);
+                CREATE TABLE IF NOT EXISTS queue (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                                  name TEXT, value TEXT);
+                CREATE INDEX IF NOT EXISTS queue_name ON queue (name, id);
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expiry(ttl: float = None) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return unpack(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+            (key, pack(value), self._expiry(ttl)),
+        )
+
+    def set_if_absent(self, key: str, value: Any, ttl: float = None) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires IS NOT NULL AND expires <= ?",
+                         (key, time.time()))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, pack(value), self._expiry(ttl)),
+            )
+            conn.execute("COMMIT")
+            return cursor.rowcount == 1
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.execute("DELETE FROM lists WHERE key = ?", (key,))
+
+    def append(self, key: str, value: Any, ttl: float = None):
+        # The whole list shares one expiry, renewed on every append (as in Redis), so
+        # readers paging by offset never lose rows to earlier ones expiring first
+        expires = self._expiry(ttl)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM lists WHERE key = ? AND expires IS NOT NULL AND expires <= ?",
+                         (key, time.time()))
+            conn.execute("UPDATE lists SET expires = ? WHERE key = ?", (expires, key))
+            conn.execute("INSERT INTO lists (key, value, expires) VALUES (?, ?, ?)",
+                         (key, pack(value), expires))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read_list(self, key: str, start: int = 0) -> List[Any]:
+        rows = self._conn().execute(
+            "SELECT value FROM lists WHERE key = ? AND (expires IS NULL OR expires > ?) "
+            "ORDER BY id LIMIT -1 OFFSET ?",
+            (key, time.time(), start),
+        ).fetchall()
+        return [unpack(r[0]) for r in rows]
+
+    def push(self, queue: str, value: Any):
+        self._conn().execute("INSERT INTO queue (name, value) VALUES (?, ?)", (queue, pack(value)))
+
+    def pop(self, queue: str, timeout: float = 5.0) -> Optional[Any]:
+        conn = self._conn()
+        deadline = time.time() + timeout
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, value FROM queue WHERE name = ? ORDER BY id LIMIT 1", (queue,)
+                ).fetchone()
+                if row:
+                    conn.execute("DELETE FROM queue WHERE id = ?", (row[0],))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if row:
+                return unpack(row[1])
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+
+class RedisStore(SharedStore):
+    """Redis-backed store for multi-host deployments"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisStore requires the 'redis' package: pip install redis") from e
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._redis.get(key)
+        return unpack(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self._redis.set(key, pack(value), ex=int(ttl) if ttl else None)
+
+    def set_if_absent(self, key: str, value: Any, ttl: float = None) -> bool:
+        return bool(self._redis.set(key, pack(value), ex=int(ttl) if ttl else None, nx=True))
+
+    def delete(self, key: str):
+        self._redis.delete(key, f"{key}:list")
+
+    def append(self, key: str, value: Any, ttl: float = None):
+        pipe = self._redis.pipeline()
+        pipe.rpush(f"{key}:list", pack(value))
+        if ttl:
+            pipe.expire(f"{key}:list", int(ttl))
+        pipe.execute()
+
+    def read_list(self, key: str, start: int = 0) -> List[Any]:
+        return [unpack(v) for v in self._redis.lrange(f"{key}:list", start, -1)]
+
+    def push(self, queue: str, value: Any):
+        self._redis.rpush(queue, pack(value))
+
+    def pop(self, queue: str, timeout: float = 5.0) -> Optional[Any]:
+        item = self._redis.blpop([queue], timeout=max(1, int(timeout)))
+        return unpack(item[1]) if item else None
+
+
+def create_store(url: str = None) -> SharedStore:
+    """Build a store from a SHARED_STORE_URL-style URL"""
+    url = url or os.getenv("SHARED_STORE_URL", "memory://")
+    if url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported SHARED_STORE_URL: {url}")
+
+
+_store: Optional[SharedStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SharedStore:
+    """Process-wide store, created on first use from SHARED_STORE_URL"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_store()
+        return _store
@@ -0,0 +1,247 @@
+"""
+Token usage ledger and budget enforcement
+Every LLM call's response.usage is recorded to SQLite (USAGE_DB_PATH) with its
+stage, model and session; pre-flight checks degrade a run (shorter article,
+no review, smaller model) before it would exhaust the daily quota
+"""
+
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, List, Optional
+
+from utils.longform import is_long_form
+
+
+_current_session: contextvars.ContextVar = contextvars.ContextVar("usage_session", default="local")
+
+
+@contextmanager
+def usage_scope(session_id: str):
+    """Attribute LLM usage recorded inside the block to ``session_id``"""
+    token = _current_session.set(session_id or "local")
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+def current_session() -> str:
+    return _current_session.get()
+
+
+class UsageLedger:
+    """Persistent per-call token usage with rollups"""
+
+    GROUP_COLUMNS = ("day", "stage", "model", "session")
+
+    def __init__(self, path: str = None):
+        self._path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def path(self) -> str:
+        return self._path or os.getenv("USAGE_DB_PATH", "data/usage.db")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS usage (
+                        ts REAL, day TEXT, stage TEXT, model TEXT, session TEXT,
+                        prompt_tokens INTEGER, completion_tokens INTEGER, total_tokens INTEGER
+                    );
+                    CREATE INDEX IF NOT EXISTS usage_day_model ON usage (day, model);
+                    CREATE INDEX IF NOT EXISTS usage_day_session ON usage (day, session);
+                """)
+                self._initialized = True
+        return conn
+
+    def record(self, stage: str, model: str, usage, session: str = None):
+        """
+        Record one LLM call
+
+        Args:
+            stage: Pipeline stage ("research", "write", "review", ...)
+            model: Model that served the call
+            usage: ``response.usage`` (object or dict with *_tokens fields)
+            session: Session to attribute to (defaults to the current usage_scope)
+        """
+        if usage is None:
+            return
+
+        def field(name: str) -> int:
+            value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+            return int(value or 0)
+
+        prompt, completion = field("prompt_tokens"), field("completion_tokens")
+        total = field("total_tokens") or prompt + completion
+        self._conn().execute(
+            "INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), date.today().isoformat(), stage, model, session or current_session(),
+             prompt, completion, total),
+        )
+
+    def tokens_used(self, day: str = None, model: str = None, session: str = None) -> int:
+        """Total tokens for a day (default today), optionally filtered by model/session"""
+        query = "SELECT COALESCE(SUM(total_tokens), 0) FROM usage WHERE day = ?"
+        params = [day or date.today().isoformat()]
+        if model:
+            query += " AND model = ?"
+            params.append(model)
+        if session:
+            query += " AND session = ?"
+            params.append(session)
+        return int(self._conn().execute(query, params).fetchone()[0])
+
+    def rollup(self, by: tuple = ("stage", "model"), day: str = None) -> List[Dict]:
+        """
+        Aggregate usage grouped by any of day/stage/model/session
+
+        Args:
+            by: Columns to group by
+            day: Restrict to one day (ISO date); None covers all days
+
+        Returns:
+            One dict per group with calls and token sums, largest first
+        """
+        columns = [c for c in by if c in self.GROUP_COLUMNS]
+        if not columns:
+            raise ValueError(f"Group by one or more of {self.GROUP_COLUMNS}")
+        select = ", ".join(columns)
+        query = (
+            f"SELECT {select}, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(total_tokens) "
+            f"FROM usage {'WHERE day = ?' if day else ''} GROUP BY {select} ORDER BY SUM(total_tokens) DESC"
+        )
+        rows = self._conn().execute(query, [day] if day else []).fetchall()
+        return [
+            {
+                **dict(zip(columns, row[:len(columns)])),
+                "calls": row[-4],
+                "prompt_tokens": row[-3],
+                "completion_tokens": row[-2],
+                "total_tokens": row[-1],
+            }
+            for row in rows
+        ]
+
+    def average_run_tokens(self, model: str, runs: int = 20) -> Optional[float]:
+        """Average tokens per LLM call times three stages, from recent calls on ``model``"""
+        row = self._conn().execute(
+            "SELECT AVG(total_tokens), COUNT(*) FROM "
+            "(SELECT total_tokens FROM usage WHERE model = ? ORDER BY ts DESC LIMIT ?)",
+            (model, runs * 3),
+        ).fetchone()
+        return row[0] * 3 if row and row[1] >= 3 else None
+
+
+class BudgetPolicy:
+    """
+    Pre-flight budget checks that degrade a run instead of failing mid-pipeline
+
+    DAILY_TOKEN_BUDGET applies per model (Groq quotas are per model) and
+    SESSION_TOKEN_BUDGET per browser session per day; 0 disables either.
+    """
+
+    SHORT_ARTICLE_WORDS = (450, 600)
+
+    def __init__(self, ledger: UsageLedger):
+        self.ledger = ledger
+
+    def _budget(self, env_var: str) -> int:
+        return int(os.getenv(env_var, 0))
+
+    def estimate_run_tokens(self, model: str) -> float:
+        return self.ledger.average_run_tokens(model) or float(os.getenv("ESTIMATED_RUN_TOKENS", 9000))
+
+    def _remaining(self, model: str, session: str) -> float:
+        remaining = float("inf")
+        daily = self._budget("DAILY_TOKEN_BUDGET")
+        if daily:
+            remaining = min(remaining, daily - self.ledger.tokens_used(model=model))
+        per_session = self._budget("SESSION_TOKEN_BUDGET")
+        if per_session:
+            remaining = min(remaining, per_session - self.ledger.tokens_used(session=session))
+        return remaining
+
+    def _shorter(self, target_words: tuple, fraction: float) -> tuple:
+        """
+        A cheaper length target and its description
+
+        Standard articles drop to SHORT_ARTICLE_WORDS; long-form targets shrink
+        in proportion to the budget left (``fraction`` of the estimate), so a
+        10,000-word request does not silently become a 600-word one.
+        """
+        if not is_long_form(target_words):
+            return self.SHORT_ARTICLE_WORDS, "Shorter article"
+        high = max(self.SHORT_ARTICLE_WORDS[1], int(target_words[1] * fraction) // 100 * 100)
+        return (int(high * 0.9), high), f"Shortened to ~{high:,} words"
+
+    def preflight(self, session: str, model: str, target_words: tuple = None, variants: int = 1) -> Dict:
+        """
+        Decide how to run the pipeline within the remaining budget
+
+        Args:
+            session: Session the run is attributed to
+            model: Requested model
+            target_words: Requested (min, max) article length; None = default.
+                Longer articles scale the token estimate proportionally
+            variants: Requested best-of-N drafts; each extra draft costs roughly
+                another writer stage (VARIANT_TOKEN_SHARE of a run)
+
+        Returns:
+            Plan dict with allowed, model, target_words (None = default),
+            variants, variant_models (None = the writer's default rotation),
+            skip_review and a list of human-readable degradations
+        """
+        fallback = os.getenv("BUDGET_FALLBACK_MODEL", "llama-3.1-8b-instant")
+        candidates = [model] + ([fallback] if fallback and fallback != model else [])
+
+        scale = max(1.0, target_words[1] / 1000) if target_words else 1.0
+        # Long-form articles are written once, section by section
+        variants = 1 if is_long_form(target_words) else max(1, variants)
+        extra = float(os.getenv("VARIANT_TOKEN_SHARE", 0.4)) * (variants - 1)
+        for candidate in candidates:
+            estimate = self.estimate_run_tokens(candidate) * scale
+            remaining = self._remaining(candidate, session)
+            degraded = [] if candidate == model else [f"Switched to {candidate} (daily budget for {model} is low)"]
+            # A fallback model keeps every draft on it rather than WRITER_VARIANT_MODELS
+            plan = {"allowed": True, "model": candidate, "target_words": target_words,
+                    "variants": variants, "variant_models": [candidate] if degraded else None,
+                    "skip_review": False, "degraded": degraded}
+            if remaining >= estimate * (1 + extra):
+                return plan
+            plan["variants"] = 1
+            if variants > 1 and remaining >= estimate:
+                degraded.append("Single draft instead of best-of-N to stay within today's token budget")
+                return plan
+            if remaining >= 0.6 * estimate:
+                plan["target_words"], shorter = self._shorter(target_words, remaining / estimate)
+                degraded.append(f"{shorter} to stay within today's token budget")
+                return plan
+            if remaining >= 0.4 * estimate:
+                plan["target_words"], shorter = self._shorter(target_words, remaining / estimate)
+                plan["skip_review"] = True
+                degraded.append(f"{shorter} and no LLM review to stay within today's token budget")
+                return plan
+
+        return {"allowed": False, "model": model, "target_words": None, "variants": 1,
+                "variant_models": None, "skip_review": True,
+                "degraded": ["Today's token budget is used up; please try again tomorrow"]}
+
+
+# Global ledger and policy
+usage_ledger = UsageLedger()
+budget_policy = BudgetPolicy(usage_ledger)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Pipeline worker for scaled deployments
+Pulls runs queued by the UI (PIPELINE_MODE=queue) from the shared store and
+executes them. Run any number of replicas against the same SHARED_STORE_URL.
+"""
+
+import os
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from loguru import logger  # noqa: E402
+
+from pipeline import JOB_QUEUE, process_job, require_shared_store  # noqa: E402
+
+
+stop_event = threading.Event()
+
+
+def work_loop(worker_name: str):
+    """Process jobs until asked to stop"""
+    store = require_shared_store()
+    while not stop_event.is_set():
+        job = store.pop(JOB_QUEUE, timeout=5)
+        if job is None:
+            continue
+        logger.info(f"{worker_name} picked up job {job['id']}: {job['topic']}")
+        process_job(job, store)
+
+
+def main():
+    concurrency = int(os.getenv("WORKER_CONCURRENCY", 2))
+    try:
+        require_shared_store()
+    except RuntimeError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    logger.info(f"Worker started with {concurrency} slot(s) on {os.getenv('SHARED_STORE_URL', 'memory://')}")
+    threads = [
+        threading.Thread(target=work_loop, args=(f"worker-{i}",), daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()